@@ -0,0 +1,214 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+import cv2
+import numpy as np
+
+
+class FramePacket:
+    """A captured frame with its sequence number and capture time."""
+    __slots__ = ("seq", "timestamp", "frame")
+
+    def __init__(self, seq: int, timestamp: float, frame: np.ndarray):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.frame = frame
+
+    @property
+    def age(self) -> float:
+        """Seconds elapsed since the frame was captured."""
+        return time.monotonic() - self.timestamp
+
+
+class CameraCaptureService:
+    """
+    Owns the camera device and keeps the newest frames in a small ring buffer.
+
+    A single thread pulls frames from the device; consumers call `latest()`
+    or `wait_for_frame()` and get a reference to the buffered frame (no copy,
+    no reopening of the device). Frames handed out must be treated as
+    read-only.
+
+    Modes:
+        "read": the thread decodes every frame with `cap.read()`.
+        "grab": the thread only calls `cap.grab()` to keep the driver queue
+                drained; `cap.retrieve()` (decode + BGR conversion) runs when
+                a consumer asks for a frame newer than the last decoded one.
+    """
+    MODES = ("read", "grab")
+
+    def __init__(self, device: int = 0, api_preference: int = cv2.CAP_ANY, ring_size: int = 4,
+                 mode: str = "read"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown capture mode: {mode}")
+        self.device = device
+        self.api_preference = api_preference
+        self.mode = mode
+        self.ring: Deque[FramePacket] = deque(maxlen=ring_size)
+        self.grabbed = 0
+        self.decoded = 0
+        self._cap = None
+        self._thread = None
+        self._running = False
+        self._users = 0
+        self._seq = 0
+        self._grab_time = 0.0
+        self._pending_retrieves = 0
+        # Held for the whole of acquire()/release(), so a reopen waits until a teardown is complete
+        self._lifecycle_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._new_frame = threading.Condition(self._lock)
+        # Serializes grab()/retrieve(): VideoCapture is not thread-safe
+        self._device_lock = threading.Lock()
+        self._device_idle = threading.Condition(self._device_lock)
+
+    def acquire(self) -> "CameraCaptureService":
+        """Register a consumer, opening the device on first use."""
+        with self._lifecycle_lock, self._lock:
+            self._users += 1
+            if self._running:
+                return self
+            print(f"[DEBUG] Opening camera {self.device} for capture service...")
+            self._cap = cv2.VideoCapture(self.device, self.api_preference)
+            if not self._cap.isOpened():
+                self._users -= 1
+                self._cap = None
+                raise RuntimeError("Cannot open camera")
+            self._running = True
+            loop = self._grab_loop if self.mode == "grab" else self._capture_loop
+            self._thread = threading.Thread(target=loop, args=(self._cap,), daemon=True)
+            self._thread.start()
+        return self
+
+    def release(self):
+        """Unregister a consumer, closing the device when nobody is left."""
+        with self._lifecycle_lock:
+            with self._lock:
+                self._users = max(0, self._users - 1)
+                if self._users > 0 or not self._running:
+                    return
+                self._running = False
+                self._new_frame.notify_all()
+                thread = self._thread
+            thread.join(timeout=2.0)
+            print("[DEBUG] Releasing camera for capture service...")
+            with self._device_lock:
+                self._cap.release()
+                self._cap = None
+            self.ring.clear()
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def _capture_loop(self, cap):
+        # A loop that outlived release()'s join must not keep running on a reopened device
+        while self._running and self._cap is cap:
+            ret, frame = cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            with self._lock:
+                self._seq += 1
+                self.grabbed += 1
+                self.decoded += 1
+                self.ring.append(FramePacket(self._seq, time.monotonic(), frame))
+                self._new_frame.notify_all()
+
+    def _grab_loop(self, cap):
+        while self._running and self._cap is cap:
+            with self._device_lock:
+                # Let consumers waiting on retrieve() go before the next grab
+                while self._pending_retrieves and self._running:
+                    self._device_idle.wait(0.05)
+                if self._cap is not cap:
+                    break
+                ok = cap.grab()
+                if ok:
+                    with self._lock:
+                        self._seq += 1
+                        self.grabbed += 1
+                        self._grab_time = time.monotonic()
+                        self._new_frame.notify_all()
+            if not ok:
+                time.sleep(0.01)
+
+    def _retrieve_latest(self) -> Optional[FramePacket]:
+        """Decode the most recent grab, reusing it if it was already decoded."""
+        with self._lock:
+            if not self._running or self._seq == 0:
+                return None
+            if self.ring and self.ring[-1].seq == self._seq:
+                return self.ring[-1]
+            self._pending_retrieves += 1
+        try:
+            with self._device_lock:
+                with self._lock:
+                    seq, grab_time = self._seq, self._grab_time
+                    if self.ring and self.ring[-1].seq == seq:
+                        return self.ring[-1]
+                if self._cap is None:
+                    return None
+                ret, frame = self._cap.retrieve()
+                if not ret:
+                    return None
+                packet = FramePacket(seq, grab_time, frame)
+                with self._lock:
+                    self.decoded += 1
+                    self.ring.append(packet)
+                return packet
+        finally:
+            with self._device_lock:
+                self._pending_retrieves -= 1
+                self._device_idle.notify_all()
+
+    def latest(self) -> Optional[FramePacket]:
+        """Return the newest frame, or None if nothing was captured yet."""
+        if self.mode == "grab":
+            return self._retrieve_latest()
+        with self._lock:
+            return self.ring[-1] if self.ring else None
+
+    def wait_for_frame(self, after_seq: int = 0, timeout: float = 1.0) -> Optional[FramePacket]:
+        """Block until a frame newer than `after_seq` is available and return it."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            # The ring is cleared on release while seq keeps counting, so also wait for a reopened device's first frame
+            while self._running and (self._seq <= after_seq or (self.mode == "read" and not self.ring)):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._new_frame.wait(remaining)
+            if self._seq <= after_seq or (self.mode == "read" and not self.ring):
+                return None
+            if self.mode == "read":
+                return self.ring[-1]
+        return self._retrieve_latest()
+
+    def stats(self) -> Dict[str, float]:
+        """Grab/decode counters; in grab mode `grabbed - decoded` is decode work skipped."""
+        with self._lock:
+            newest = self._grab_time if self.mode == "grab" else (self.ring[-1].timestamp if self.ring else 0.0)
+            return {
+                'grabbed': self.grabbed,
+                'decoded': self.decoded,
+                'skipped_decodes': self.grabbed - self.decoded,
+                'frame_age': time.monotonic() - newest if newest else -1.0,
+            }
+
+
+_services: Dict[int, CameraCaptureService] = {}
+_services_lock = threading.Lock()
+
+
+def get_camera_service(device: int = 0, api_preference: int = cv2.CAP_ANY,
+                       mode: str = "grab") -> CameraCaptureService:
+    """Return the process-wide capture service for `device`, creating it if needed."""
+    with _services_lock:
+        service = _services.get(device)
+        if service is None:
+            service = CameraCaptureService(device, api_preference, mode=mode)
+            _services[device] = service
+        return service
@@ -0,0 +1,458 @@
+import importlib
+import multiprocessing as mp
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from mood import MOODS
+from pipeline import Pipeline, detector_stages
+
+FRAME_SIZE = (320, 240)
+FRAME_SHAPE = (FRAME_SIZE[1], FRAME_SIZE[0], 3)
+NUM_SLOTS = 3  # triple buffer: one being written, one latest, one being read
+LOCK_TIMEOUT = 0.5  # seconds; a lock held longer than this is treated as lost with a dead worker
+FEED_POLL = 0.005  # seconds between checks of H_WANT_FRAME by the feeder
+
+# int64 header fields
+H_FRAME_SEQ, H_LATEST_SLOT, H_READING_SLOT, H_READY, H_STOP, H_WANT_FRAME = range(6)
+HEADER_LEN = 8
+# float64 result fields
+(R_SEQ, R_FRAME_SEQ, R_FRAME_TIME, R_HAS_FACE, R_HAPPY, R_NORMAL, R_SAD, R_MOOD,
+ R_X, R_Y, R_W, R_H, R_HEARTBEAT, R_LATENCY_MS, R_GATE_PROCESSED, R_GATE_SKIPPED,
+ R_RATE_HZ, R_TARGET_HZ) = range(18)
+RESULT_LEN = 32
+
+
+class SharedDetectionBuffers:
+    """
+    Frames and results exchanged with the detection worker through one
+    `multiprocessing.shared_memory` block:
+
+        header  int64[HEADER_LEN]        frame sequence, slot bookkeeping, ready/stop/want-frame flags
+        result  float64[RESULT_LEN]      newest detection result
+        times   float64[NUM_SLOTS]       capture time of each frame slot
+        frames  uint8[NUM_SLOTS, H, W, 3]
+
+    All header/result access happens under `lock`; frame pixels are written
+    outside the lock into a slot the reader cannot claim. The lock is only
+    ever taken with a timeout, re-reading `self.lock` each time, because the
+    engine swaps in a new one when a worker dies holding it. Signalling is done
+    by polling the header rather than with multiprocessing Events, whose
+    internal semaphores can wedge the other side if a worker dies mid-wait.
+    """
+
+    def __init__(self, lock, name: Optional[str] = None):
+        self.lock = lock
+        frames_bytes = NUM_SLOTS * int(np.prod(FRAME_SHAPE))
+        size = HEADER_LEN * 8 + RESULT_LEN * 8 + NUM_SLOTS * 8 + frames_bytes
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        buf = self.shm.buf
+        offset = 0
+        self.header = np.ndarray((HEADER_LEN,), dtype=np.int64, buffer=buf, offset=offset)
+        offset += HEADER_LEN * 8
+        self.result = np.ndarray((RESULT_LEN,), dtype=np.float64, buffer=buf, offset=offset)
+        offset += RESULT_LEN * 8
+        self.times = np.ndarray((NUM_SLOTS,), dtype=np.float64, buffer=buf, offset=offset)
+        offset += NUM_SLOTS * 8
+        self.frames = np.ndarray((NUM_SLOTS,) + FRAME_SHAPE, dtype=np.uint8, buffer=buf, offset=offset)
+        if self.owner:
+            self.header[:] = 0
+            self.header[H_LATEST_SLOT] = -1
+            self.header[H_READING_SLOT] = -1
+            self.result[:] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @contextmanager
+    def locked(self, timeout: float = LOCK_TIMEOUT):
+        """Hold the current lock for the block; yields False (lock lost) if it was not free within `timeout`."""
+        lock = self.lock
+        acquired = lock.acquire(timeout=timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+
+    def write_frame(self, frame: np.ndarray, timestamp: float) -> bool:
+        """Resize `frame` straight into a free slot and publish it. False if the frame was dropped."""
+        with self.locked() as acquired:
+            if not acquired:
+                return False
+            busy = (self.header[H_LATEST_SLOT], self.header[H_READING_SLOT])
+            slot = next(i for i in range(NUM_SLOTS) if i not in busy)
+        cv2.resize(frame, FRAME_SIZE, dst=self.frames[slot])
+        with self.locked() as acquired:
+            if not acquired:
+                return False
+            self.times[slot] = timestamp
+            self.header[H_LATEST_SLOT] = slot
+            self.header[H_FRAME_SEQ] += 1
+            # One frame per request; the worker raises the flag again when it wants the next
+            self.header[H_WANT_FRAME] = 0
+        return True
+
+    def frame_wanted(self) -> bool:
+        """True if the worker has asked for a new frame (H_WANT_FRAME)."""
+        with self.locked() as acquired:
+            return acquired and bool(self.header[H_WANT_FRAME])
+
+    def read_frame(self, after_seq: int) -> Optional[Tuple[int, float, np.ndarray]]:
+        """Copy out the newest frame if it is newer than `after_seq`."""
+        with self.locked() as acquired:
+            if not acquired:
+                return None
+            seq = int(self.header[H_FRAME_SEQ])
+            slot = int(self.header[H_LATEST_SLOT])
+            if seq <= after_seq or slot < 0:
+                return None
+            self.header[H_READING_SLOT] = slot
+            timestamp = float(self.times[slot])
+        frame = self.frames[slot].copy()
+        with self.locked() as acquired:
+            # If this fails the slot just stays claimed until the next read; the writer has another free one
+            if acquired:
+                self.header[H_READING_SLOT] = -1
+        return seq, timestamp, frame
+
+    def close(self):
+        # Drop numpy views before closing the mapping
+        self.header = self.result = self.times = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def build_detector(detector_spec: Tuple[str, str], detector_kwargs: Optional[Dict[str, Any]] = None,
+                   options: Optional[Dict[str, Any]] = None):
+    """
+    Instantiate `module.Class` from `detector_spec` and apply the optional
+    layers named in `options`, each mapped to its keyword arguments:
+
+        'result_cache': CachedDetector reusing scores of perceptually identical crops
+        'roi_search': RoiFaceSearch around the last face on a lower pyramid level
+        'tracking':   FaceTracker between full face detections
+
+    ('motion_gate' and 'adaptive_rate' are also read from the same options by
+    the worker, but they gate pipeline stages / frame sampling rather than
+    wrapping the detector.)
+    """
+    module_name, class_name = detector_spec
+    print(f"[DEBUG] Loading detector {module_name}.{class_name}...")
+    detector = getattr(importlib.import_module(module_name), class_name)(**(detector_kwargs or {}))
+    options = options or {}
+    if 'result_cache' in options:
+        from result_cache import CachedDetector
+        detector = CachedDetector(detector, **options['result_cache'])
+    if 'roi_search' in options:
+        from roi_search import RoiFaceSearch
+        detector = RoiFaceSearch(detector, **options['roi_search'])
+    if 'tracking' in options:
+        from face_tracking import FaceTracker
+        detector = FaceTracker(detector, **options['tracking'])
+    return detector
+
+
+def warm_up(detector):
+    """One detection and inference on a synthetic frame, so lazy runtime setup is not paid by the first scan."""
+    start = time.monotonic()
+    frame = np.random.default_rng(0).integers(0, 256, FRAME_SHAPE, dtype=np.uint8)
+    detector.detect_faces(frame)
+    detector.process_faces([frame[60:180, 100:220]])
+    print(f"[DEBUG] Detector warm-up took {1000 * (time.monotonic() - start):.0f} ms")
+
+
+def _worker_main(shm_name: str, lock, detector_spec: Tuple[str, str], detector_kwargs: Dict[str, Any],
+                 detector_options: Dict[str, Any], poll_interval: float = 0.005):
+    """Entry point of the detection process: shm frames -> pipeline -> shm result."""
+    buffers = SharedDetectionBuffers(lock, name=shm_name)
+    detector = build_detector(detector_spec, detector_kwargs, detector_options)
+    gate = None
+    if 'motion_gate' in detector_options:
+        from motion_gate import MotionGate
+        gate = MotionGate(**detector_options['motion_gate'])
+    scheduler = None
+    if 'adaptive_rate' in detector_options:
+        from rate_scheduler import AdaptiveRateScheduler
+        scheduler = AdaptiveRateScheduler(**detector_options['adaptive_rate'])
+    warm_up(detector)
+    # Fresh lock from a just-started engine or supervisor, so wait for it as long as it takes
+    with lock:
+        buffers.header[H_READY] = 1
+        # Keep result numbering monotonic across worker restarts
+        state = {'last_seq': 0, 'result_seq': int(buffers.result[R_SEQ]),
+                 'last_emit': 0.0, 'last_sink': time.monotonic()}
+
+    def source():
+        # The heartbeat tracks results, not this loop: while frames go in and no result
+        # comes out (a stage stuck in invoke()), it stays at the last result and goes stale.
+        # With nothing taken in (no camera frames) the worker counts as alive.
+        now = time.monotonic()
+        beat = now if state['last_emit'] <= state['last_sink'] else state['last_sink']
+        wait = scheduler.due() if scheduler is not None else 0.0
+        with buffers.locked() as acquired:
+            if acquired:
+                buffers.result[R_HEARTBEAT] = beat
+                # Only ask for a frame when one will be used, so the feeder skips retrieving the rest
+                buffers.header[H_WANT_FRAME] = 1 if wait <= 0 else 0
+        if wait > 0:
+            # Short naps so the heartbeat and a sped-up schedule are picked up quickly
+            time.sleep(min(wait, 0.05))
+            return None
+        packet = buffers.read_frame(state['last_seq'])
+        if packet is None:
+            time.sleep(poll_interval)
+            return None
+        if scheduler is not None:
+            scheduler.sampled()
+        state['last_seq'], timestamp, frame = packet
+        state['last_emit'] = time.monotonic()
+        return {'frame': frame, 'timestamp': timestamp, 'frame_seq': state['last_seq']}
+
+    def sink(item):
+        state['last_sink'] = time.monotonic()
+        state['result_seq'] += 1
+        emotions, face = item['emotions'], item['face']
+        if scheduler is not None:
+            scheduler.observe(item)
+        with buffers.locked() as acquired:
+            if not acquired:
+                return
+            r = buffers.result
+            r[R_SEQ] = state['result_seq']
+            r[R_HEARTBEAT] = state['last_sink']
+            r[R_FRAME_SEQ] = item['frame_seq']
+            r[R_FRAME_TIME] = item['timestamp']
+            r[R_LATENCY_MS] = 1000.0 * (time.monotonic() - item['timestamp'])
+            r[R_HAS_FACE] = 1.0 if emotions is not None else 0.0
+            if gate is not None:
+                r[R_GATE_PROCESSED], r[R_GATE_SKIPPED] = gate.processed, gate.skipped
+            if scheduler is not None:
+                r[R_RATE_HZ], r[R_TARGET_HZ] = scheduler.effective_hz, scheduler.target_hz
+            if emotions is not None:
+                r[R_HAPPY], r[R_NORMAL], r[R_SAD] = emotions['Happy'], emotions['Normal'], emotions['Sad']
+                r[R_MOOD] = MOODS.index(item['mood'])
+                r[R_X], r[R_Y], r[R_W], r[R_H] = face['x'], face['y'], face['w'], face['h']
+
+    pipeline = Pipeline(source, detector_stages(detector, gate=gate), sink).start()
+    parent = mp.parent_process()
+    try:
+        # Also exit if the UI process went away without stopping us (os._exit)
+        while not buffers.header[H_STOP] and parent.is_alive():
+            time.sleep(0.5)
+    finally:
+        pipeline.stop()
+        buffers.close()
+
+
+class DetectionEngine:
+    """
+    Runs face detection and emotion inference in a separate process so the
+    Qt event loop never competes with the models for the GIL.
+
+    A feeder thread copies the camera frames the worker asks for into shared
+    memory; the worker process writes its newest result back. `poll()` is a
+    cheap non-blocking read meant to be called from a QTimer. The worker is restarted if it dies
+    or stops producing results while it is being fed frames (its heartbeat
+    goes stale). Restart delays back off exponentially and reset once a
+    worker has stayed up for `healthy_after` seconds.
+    """
+
+    def __init__(self, camera, detector_spec: Tuple[str, str], detector_kwargs: Optional[Dict[str, Any]] = None,
+                 detector_options: Optional[Dict[str, Any]] = None, heartbeat_timeout: float = 30.0,
+                 healthy_after: float = 60.0):
+        self.camera = camera
+        self.detector_spec = detector_spec
+        self.detector_kwargs = detector_kwargs or {}
+        self.detector_options = detector_options or {}
+        self.heartbeat_timeout = heartbeat_timeout
+        self.healthy_after = healthy_after
+        self.restarts = 0
+        self._crash_streak = 0  # restarts since the last worker that stayed up healthy_after seconds
+        self._spawned_at = 0.0
+        self._ctx = mp.get_context("spawn")
+        self._lock = self._ctx.Lock()
+        self._buffers = None
+        self._process = None
+        self._running = False
+        self._last_polled = 0
+        self._last_ready = False
+        self._threads = []
+
+    def start(self):
+        self._buffers = SharedDetectionBuffers(self._lock)
+        self._running = True
+        self._spawn_worker()
+        self._threads = [
+            threading.Thread(target=self._feed_frames, daemon=True),
+            threading.Thread(target=self._supervise, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._buffers is not None:
+            self._buffers.header[H_STOP] = 1
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        if self._process is not None:
+            self._process.join(timeout=3.0)
+            if self._process.is_alive():
+                self._process.terminate()
+        if self._buffers is not None:
+            self._buffers.close()
+            self._buffers = None
+
+    def _spawn_worker(self):
+        # No worker is running and the lock is new (start or _supervise), so a plain wait is safe
+        with self._buffers.lock:
+            self._buffers.header[H_READY] = 0
+            self._buffers.header[H_STOP] = 0
+            self._buffers.header[H_WANT_FRAME] = 0
+            self._buffers.result[R_HEARTBEAT] = time.monotonic()
+        self._process = self._ctx.Process(
+            target=_worker_main,
+            args=(self._buffers.name, self._lock, self.detector_spec, self.detector_kwargs,
+                  self.detector_options),
+            daemon=True,
+        )
+        self._process.start()
+        self._spawned_at = time.monotonic()
+        print(f"[DEBUG] Detection worker started (pid {self._process.pid})")
+
+    def _feed_frames(self):
+        try:
+            self.camera.acquire()
+        except RuntimeError:
+            print("[DEBUG] Could not open the camera for the detection engine.")
+            return
+        try:
+            last_seq = 0
+            while self._running:
+                # Retrieve (decode + resize) only frames the worker asked for, not every camera frame
+                if not self._buffers.frame_wanted():
+                    time.sleep(FEED_POLL)
+                    continue
+                packet = self.camera.wait_for_frame(last_seq)
+                if packet is None:
+                    continue
+                last_seq = packet.seq
+                self._buffers.write_frame(packet.frame, packet.timestamp)
+        finally:
+            self.camera.release()
+
+    def _supervise(self):
+        while self._running:
+            time.sleep(1.0)
+            if not self._running:
+                break
+            with self._buffers.locked() as acquired:
+                if acquired:
+                    ready = bool(self._buffers.header[H_READY])
+                    heartbeat = float(self._buffers.result[R_HEARTBEAT])
+            # An unavailable lock is only a problem if its holder died, which is_alive() catches
+            stalled = acquired and ready and time.monotonic() - heartbeat > self.heartbeat_timeout
+            if self._process.is_alive() and not stalled:
+                if self._crash_streak and time.monotonic() - self._spawned_at > self.healthy_after:
+                    print(f"[DEBUG] Detection worker healthy for {self.healthy_after:.0f}s, resetting restart backoff")
+                    self._crash_streak = 0
+                continue
+            if stalled:
+                print("[DEBUG] Detection worker stopped responding, killing it.")
+                self._process.kill()
+            self._process.join(timeout=1.0)
+            # The dead worker may have held the lock; hand the next one a fresh lock
+            self._lock = self._buffers.lock = self._ctx.Lock()
+            # Not ready while no worker runs, including the restart delay below
+            with self._lock:
+                self._buffers.header[H_READY] = 0
+            self._last_ready = False
+            self.restarts += 1
+            self._crash_streak += 1
+            delay = min(30.0, 2.0 ** min(self._crash_streak, 5))
+            print(f"[DEBUG] Detection worker exited (code {self._process.exitcode}), "
+                  f"restarting in {delay:.0f}s (restart #{self.restarts})")
+            time.sleep(delay)
+            if self._running:
+                self._spawn_worker()
+
+    @property
+    def ready(self) -> bool:
+        """
+        True once the worker has loaded its models and run a warm-up inference.
+        Never blocks (called from the UI thread): a busy lock returns the last known state.
+        """
+        if self._buffers is None:
+            return False
+        with self._buffers.locked(timeout=0) as acquired:
+            if acquired:
+                self._last_ready = bool(self._buffers.header[H_READY])
+        return self._last_ready
+
+    def latest_result(self) -> Optional[Dict[str, Any]]:
+        """Snapshot of the newest result, or None before the first one (or while the lock is busy)."""
+        if self._buffers is None:
+            return None
+        with self._buffers.locked(timeout=0) as acquired:
+            if not acquired:
+                return None
+            r = self._buffers.result.copy()
+        if r[R_SEQ] == 0:
+            return None
+        has_face = r[R_HAS_FACE] > 0
+        return {
+            'seq': int(r[R_SEQ]),
+            'frame_seq': int(r[R_FRAME_SEQ]),
+            'timestamp': float(r[R_FRAME_TIME]),
+            'latency_ms': float(r[R_LATENCY_MS]),
+            'gate_processed': int(r[R_GATE_PROCESSED]),
+            'gate_skipped': int(r[R_GATE_SKIPPED]),
+            'rate_hz': float(r[R_RATE_HZ]),
+            'target_hz': float(r[R_TARGET_HZ]),
+            'emotions': {'Happy': float(r[R_HAPPY]), 'Normal': float(r[R_NORMAL]), 'Sad': float(r[R_SAD])}
+            if has_face else None,
+            'mood': MOODS[int(r[R_MOOD])] if has_face else None,
+            'face': {'x': int(r[R_X]), 'y': int(r[R_Y]), 'w': int(r[R_W]), 'h': int(r[R_H])}
+            if has_face else None,
+        }
+
+    def poll(self) -> Optional[Dict[str, Any]]:
+        """Non-blocking: the newest result if it was not returned before, else None."""
+        result = self.latest_result()
+        if result is None or result['seq'] == self._last_polled:
+            return None
+        self._last_polled = result['seq']
+        return result
+
+    def wait_until_ready(self, timeout: float = 30.0) -> bool:
+        """Block (off the UI thread) until the worker has loaded and warmed up its models."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.ready:
+                return True
+            time.sleep(0.05)
+        return self.ready
+
+    def wait_for_result(self, newer_than: float, timeout: float = 3.0) -> Optional[Dict[str, Any]]:
+        """Block (off the UI thread) until a result for a frame captured after `newer_than`."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            result = self.latest_result()
+            if result is not None and result['timestamp'] > newer_than:
+                return result
+            time.sleep(0.02)
+        return None
@@ -0,0 +1,160 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+SEARCH_DIRS = ("/home/pi", ".", os.path.dirname(os.path.abspath(__file__)))
+
+
+def find_model_file(filename: str, extra_dirs: Tuple[str, ...] = ()) -> str:
+    """Look for a detector model file in the usual places, returning the first hit."""
+    if os.path.isabs(filename) and os.path.exists(filename):
+        return filename
+    for directory in SEARCH_DIRS + extra_dirs:
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"Face detector model not found: {filename}")
+
+
+class FaceDetectorBackend:
+    """
+    Common interface of the face detectors. `detect` takes a BGR frame (or a
+    grayscale one if `accepts_gray`) and returns boxes as
+    [{'x', 'y', 'w', 'h'}, ...] in that image's coordinates. `max_size` of
+    (0, 0) means unbounded.
+    """
+    name = "base"
+    accepts_gray = False
+
+    def __init__(self, min_size: Tuple[int, int] = (48, 48)):
+        self.min_size = min_size
+
+    def detect(self, image: np.ndarray, min_size: Optional[Tuple[int, int]] = None,
+               max_size: Tuple[int, int] = (0, 0)) -> List[Dict[str, int]]:
+        raise NotImplementedError
+
+    def _size_ok(self, w: float, h: float, min_size, max_size) -> bool:
+        if w < min_size[0] or h < min_size[1]:
+            return False
+        return not (max_size[0] and (w > max_size[0] or h > max_size[1]))
+
+
+class CascadeBackend(FaceDetectorBackend):
+    """cv2.CascadeClassifier based detector (Haar or LBP features)."""
+    accepts_gray = True
+    CASCADE_FILE = ""
+
+    def __init__(self, cascade_file: Optional[str] = None, scale_factor: float = 1.1,
+                 min_neighbors: int = 3, min_size: Tuple[int, int] = (48, 48)):
+        super().__init__(min_size)
+        path = find_model_file(cascade_file or self.CASCADE_FILE, self._extra_dirs())
+        self.cascade = cv2.CascadeClassifier(path)
+        if self.cascade.empty():
+            raise RuntimeError(f"Could not load cascade: {path}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+    def _extra_dirs(self) -> Tuple[str, ...]:
+        return (cv2.data.haarcascades,)
+
+    def detect(self, image, min_size=None, max_size=(0, 0)):
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        faces = self.cascade.detectMultiScale(
+            gray, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors,
+            minSize=min_size or self.min_size, maxSize=max_size
+        )
+        return [{'x': x, 'y': y, 'w': w, 'h': h} for (x, y, w, h) in faces]
+
+
+class HaarBackend(CascadeBackend):
+    name = "haar"
+    CASCADE_FILE = "haarcascade_frontalface_default.xml"
+
+
+class LbpBackend(CascadeBackend):
+    """LBP cascade: several times faster than Haar, somewhat lower recall."""
+    name = "lbp"
+    CASCADE_FILE = "lbpcascade_frontalface_improved.xml"
+
+    def _extra_dirs(self):
+        # pip wheels only ship haarcascades; a source install has lbpcascades next to it
+        return (os.path.join(os.path.dirname(os.path.dirname(cv2.data.haarcascades)), "lbpcascades"),)
+
+
+class YuNetBackend(FaceDetectorBackend):
+    """OpenCV DNN YuNet detector (cv2.FaceDetectorYN) loaded from a local ONNX file."""
+    name = "yunet"
+    MODEL_FILE = "face_detection_yunet_2023mar.onnx"
+
+    def __init__(self, model_file: Optional[str] = None, score_threshold: float = 0.7,
+                 min_size: Tuple[int, int] = (48, 48)):
+        super().__init__(min_size)
+        path = find_model_file(model_file or self.MODEL_FILE)
+        self.detector = cv2.FaceDetectorYN.create(path, "", (320, 240), score_threshold)
+        self._input_size = (320, 240)
+
+    def detect(self, image, min_size=None, max_size=(0, 0)):
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        size = (image.shape[1], image.shape[0])
+        if size != self._input_size:
+            self.detector.setInputSize(size)
+            self._input_size = size
+        _, faces = self.detector.detect(image)
+        if faces is None:
+            return []
+        min_size = min_size or self.min_size
+        return [
+            {'x': max(0, int(x)), 'y': max(0, int(y)), 'w': int(w), 'h': int(h)}
+            for x, y, w, h in faces[:, :4]
+            if self._size_ok(w, h, min_size, max_size)
+        ]
+
+
+class Res10Backend(FaceDetectorBackend):
+    """OpenCV DNN res10 SSD face detector (Caffe) loaded from local files."""
+    name = "res10"
+    PROTOTXT = "deploy.prototxt"
+    MODEL_FILE = "res10_300x300_ssd_iter_140000.caffemodel"
+
+    def __init__(self, prototxt: Optional[str] = None, model_file: Optional[str] = None,
+                 score_threshold: float = 0.6, min_size: Tuple[int, int] = (48, 48)):
+        super().__init__(min_size)
+        self.net = cv2.dnn.readNetFromCaffe(
+            find_model_file(prototxt or self.PROTOTXT),
+            find_model_file(model_file or self.MODEL_FILE),
+        )
+        self.score_threshold = score_threshold
+
+    def detect(self, image, min_size=None, max_size=(0, 0)):
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        height, width = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(image, 1.0, (300, 300), (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]
+        min_size = min_size or self.min_size
+        faces = []
+        for det in detections[detections[:, 2] >= self.score_threshold]:
+            x0, y0 = max(0, int(det[3] * width)), max(0, int(det[4] * height))
+            x1, y1 = min(width, int(det[5] * width)), min(height, int(det[6] * height))
+            w, h = x1 - x0, y1 - y0
+            if self._size_ok(w, h, min_size, max_size):
+                faces.append({'x': x0, 'y': y0, 'w': w, 'h': h})
+        return faces
+
+
+FACE_BACKENDS = {
+    backend.name: backend
+    for backend in (HaarBackend, LbpBackend, YuNetBackend, Res10Backend)
+}
+CASCADE_BACKENDS = ("haar", "lbp")
+
+
+def create_face_backend(name: str = "haar", **kwargs) -> FaceDetectorBackend:
+    """Instantiate a backend from FACE_BACKENDS by name."""
+    if name not in FACE_BACKENDS:
+        raise ValueError(f"Unknown face detector backend: {name} (choose from {', '.join(FACE_BACKENDS)})")
+    return FACE_BACKENDS[name](**kwargs)
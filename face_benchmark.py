@@ -0,0 +1,131 @@
+"""
+Head-to-head benchmark of the face detector backends in face_backends.py.
+
+Fixture layout (local, not shipped):
+
+    fixtures/faces/
+        *.jpg / *.png          test images
+        labels.json            {"image.jpg": [[x, y, w, h], ...], ...} in image pixels
+
+Images are resized to the pipeline's 320x240 (labels are scaled along)
+unless --size native is given. For each backend it reports mean and p95
+latency, CPU% (process CPU time / wall time, >100% when OpenCV uses
+several threads), recall and false positives at IoU >= --iou.
+
+    python face_benchmark.py --backends haar lbp yunet --repeat 3
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from face_backends import FACE_BACKENDS, create_face_backend
+from face_tracking import iou
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.bmp")
+
+
+def load_fixtures(folder: str, size) -> List[Dict]:
+    labels_path = os.path.join(folder, "labels.json")
+    labels = {}
+    if os.path.exists(labels_path):
+        with open(labels_path) as f:
+            labels = json.load(f)
+    fixtures = []
+    for pattern in IMAGE_PATTERNS:
+        for path in sorted(glob.glob(os.path.join(folder, pattern))):
+            image = cv2.imread(path)
+            if image is None:
+                print(f"[DEBUG] Skipping unreadable image {path}")
+                continue
+            name = os.path.basename(path)
+            boxes = labels.get(name)
+            if size is not None:
+                sx, sy = size[0] / image.shape[1], size[1] / image.shape[0]
+                image = cv2.resize(image, size)
+                if boxes is not None:
+                    boxes = [[x * sx, y * sy, w * sx, h * sy] for x, y, w, h in boxes]
+            fixtures.append({
+                'name': name,
+                'image': image,
+                'boxes': None if boxes is None else [
+                    {'x': x, 'y': y, 'w': w, 'h': h} for x, y, w, h in boxes
+                ],
+            })
+    return fixtures
+
+
+def benchmark_backend(backend, fixtures: List[Dict], repeat: int, iou_threshold: float) -> Dict[str, float]:
+    latencies = []
+    true_positives = false_positives = labelled_faces = 0
+    # Warm-up so lazy initialisation is not timed
+    backend.detect(fixtures[0]['image'])
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for run in range(repeat):
+        for fixture in fixtures:
+            start = time.perf_counter()
+            faces = backend.detect(fixture['image'])
+            latencies.append(time.perf_counter() - start)
+            if run or fixture['boxes'] is None:
+                continue
+            labelled_faces += len(fixture['boxes'])
+            unmatched = list(faces)
+            for truth in fixture['boxes']:
+                best = max(unmatched, key=lambda f: iou(f, truth), default=None)
+                if best is not None and iou(best, truth) >= iou_threshold:
+                    true_positives += 1
+                    unmatched.remove(best)
+            false_positives += len(unmatched)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    latencies_ms = np.array(latencies) * 1000.0
+    return {
+        'mean_ms': float(latencies_ms.mean()),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'cpu_percent': 100.0 * cpu / wall if wall > 0 else 0.0,
+        'recall': true_positives / labelled_faces if labelled_faces else float('nan'),
+        'false_positives': false_positives,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark face detector backends")
+    parser.add_argument("--fixtures", default="fixtures/faces", help="folder with images and labels.json")
+    parser.add_argument("--backends", nargs="+", default=list(FACE_BACKENDS), choices=list(FACE_BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the fixture set")
+    parser.add_argument("--size", default="320x240", help="WxH to resize images to, or 'native'")
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU needed to count a detection as a hit")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    size = None if args.size == "native" else tuple(int(v) for v in args.size.split("x"))
+    fixtures = load_fixtures(args.fixtures, size)
+    if not fixtures:
+        raise SystemExit(f"No images found in {args.fixtures}")
+    print(f"{len(fixtures)} images, {args.repeat} passes, size {args.size}")
+
+    results = {}
+    print(f"{'backend':<8} {'mean ms':>8} {'p95 ms':>8} {'CPU %':>7} {'recall':>7} {'FP':>5}")
+    for name in args.backends:
+        try:
+            backend = create_face_backend(name)
+        except (FileNotFoundError, RuntimeError, AttributeError, cv2.error) as e:
+            print(f"{name:<8} unavailable: {e}")
+            continue
+        r = benchmark_backend(backend, fixtures, args.repeat, args.iou)
+        results[name] = r
+        print(f"{name:<8} {r['mean_ms']:8.2f} {r['p95_ms']:8.2f} {r['cpu_percent']:7.0f} "
+              f"{r['recall']:7.2f} {r['false_positives']:5d}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import threading
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+
+def iou(a: Dict[str, int], b: Dict[str, int]) -> float:
+    """Intersection over union of two face boxes."""
+    x1, y1 = max(a['x'], b['x']), max(a['y'], b['y'])
+    x2 = min(a['x'] + a['w'], b['x'] + b['w'])
+    y2 = min(a['y'] + a['h'], b['y'] + b['h'])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = a['w'] * a['h'] + b['w'] * b['h'] - inter
+    return inter / union if union > 0 else 0.0
+
+
+class FaceTracker:
+    """
+    Wraps a detector so the full face detector only runs every `detect_every`
+    frames, or sooner when a track is lost. In between, each face box is
+    followed by template matching in a small window around its last position.
+
+    Boxes returned by `detect_faces` keep the detector's sizes and carry a
+    stable 'id'. Everything else (process_face, classify_mood, ...) is
+    forwarded to the wrapped detector, so this is a drop-in replacement.
+    """
+
+    def __init__(self, detector, detect_every: int = 5, min_confidence: float = 0.6,
+                 iou_threshold: float = 0.3, search_margin: float = 0.5, max_misses: int = 2):
+        self.detector = detector
+        self.detect_every = max(1, detect_every)
+        self.min_confidence = min_confidence
+        self.iou_threshold = iou_threshold
+        self.search_margin = search_margin
+        self.max_misses = max_misses
+        self.tracks: List[Dict] = []
+        self.next_id = 1
+        self.frames_since_detect = 0
+        self.detections = 0
+        self.tracked_frames = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name == "detector":
+            raise AttributeError(name)
+        return getattr(self.detector, name)
+
+    def detect_faces(self, frame: np.ndarray) -> List[Dict[str, int]]:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        with self._lock:
+            self.frames_since_detect += 1
+            active = [t for t in self.tracks if t['misses'] == 0]
+            if not active or self.frames_since_detect >= self.detect_every or not self._track(active, gray):
+                self._detect(frame, gray)
+            else:
+                self.tracked_frames += 1
+            return [self._box(t) for t in self.tracks if t['misses'] == 0]
+
+    def _track(self, tracks: List[Dict], gray: np.ndarray) -> bool:
+        """Move each track to its best template match; False if any match is too weak."""
+        height, width = gray.shape[:2]
+        moved = []
+        for track in tracks:
+            mx = int(track['w'] * self.search_margin)
+            my = int(track['h'] * self.search_margin)
+            x0, y0 = max(0, track['x'] - mx), max(0, track['y'] - my)
+            x1 = min(width, track['x'] + track['w'] + mx)
+            y1 = min(height, track['y'] + track['h'] + my)
+            window = gray[y0:y1, x0:x1]
+            template = track['template']
+            if window.shape[0] < template.shape[0] or window.shape[1] < template.shape[1]:
+                return False
+            scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+            _, confidence, _, (dx, dy) = cv2.minMaxLoc(scores)
+            if confidence < self.min_confidence:
+                return False
+            moved.append((track, x0 + dx, y0 + dy, confidence))
+        # Only commit once every track matched, so a lost track falls back cleanly
+        for track, x, y, confidence in moved:
+            track['x'], track['y'], track['confidence'] = x, y, confidence
+        return True
+
+    def _detect(self, frame: np.ndarray, gray: np.ndarray):
+        faces = self.detector.detect_faces(frame)
+        self.detections += 1
+        self.frames_since_detect = 0
+
+        # Greedy IoU association, best overlaps first
+        pairs = sorted(
+            ((iou(track, face), ti, fi) for ti, track in enumerate(self.tracks) for fi, face in enumerate(faces)),
+            reverse=True,
+        )
+        matched_tracks, matched_faces = set(), set()
+        for overlap, ti, fi in pairs:
+            if overlap < self.iou_threshold:
+                break
+            if ti in matched_tracks or fi in matched_faces:
+                continue
+            matched_tracks.add(ti)
+            matched_faces.add(fi)
+            self._reset_track(self.tracks[ti], faces[fi], gray)
+
+        survivors = []
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                # Keep missed tracks around briefly so their id survives a flicker
+                track['misses'] += 1
+            if track['misses'] <= self.max_misses:
+                survivors.append(track)
+        for fi, face in enumerate(faces):
+            if fi not in matched_faces:
+                track = {'id': self.next_id}
+                self.next_id += 1
+                self._reset_track(track, face, gray)
+                survivors.append(track)
+        self.tracks = survivors
+
+    def _reset_track(self, track: Dict, face: Dict[str, int], gray: np.ndarray):
+        x, y, w, h = (int(face[k]) for k in ('x', 'y', 'w', 'h'))
+        track.update(x=x, y=y, w=w, h=h, misses=0, confidence=1.0,
+                     template=gray[y:y+h, x:x+w].copy())
+
+    @staticmethod
+    def _box(track: Dict) -> Dict[str, int]:
+        return {'x': track['x'], 'y': track['y'], 'w': track['w'], 'h': track['h'], 'id': track['id']}
+
+    def stats(self) -> Dict[str, float]:
+        frames = self.detections + self.tracked_frames
+        return {
+            'detections': self.detections,
+            'tracked_frames': self.tracked_frames,
+            'detect_ratio': self.detections / frames if frames else 0.0,
+            'tracks': len(self.tracks),
+        }
@@ -4,13 +4,22 @@ from PIL import Image
 import numpy as np
 import cv2
 from datetime import datetime
-from typing import Union, Dict, Tuple
+from typing import Union, Dict, List, Optional
+
+from face_backends import CASCADE_BACKENDS, create_face_backend
+from siglip_fast import FastSiglipClassifier
 
 class FacialEmotionDetector:
-    def __init__(self):
-        # Using AutoImageProcessor instead of AutoProcessor
-        self.processor = AutoImageProcessor.from_pretrained("prithivMLmods/Facial-Emotion-Detection-SigLIP2")
-        self.model = AutoModelForImageClassification.from_pretrained("prithivMLmods/Facial-Emotion-Detection-SigLIP2")
+    MAX_BATCH = 8  # faces per forward pass in process_faces
+
+    def __init__(self, face_backend: str = "haar", fast: bool = False,
+                 num_threads: Optional[int] = None, compile_mode: str = "eager"):
+        # CPU-optimized path (see siglip_fast.py); compile_mode "torchscript"/"int8" caches a trace on disk
+        self.fast = FastSiglipClassifier(num_threads=num_threads, compile_mode=compile_mode) if fast else None
+        if self.fast is None:
+            # Using AutoImageProcessor instead of AutoProcessor (the fast path preprocesses itself)
+            self.processor = AutoImageProcessor.from_pretrained("prithivMLmods/Facial-Emotion-Detection-SigLIP2")
+            self.model = AutoModelForImageClassification.from_pretrained("prithivMLmods/Facial-Emotion-Detection-SigLIP2")
         
         # Define the specific emotion mapping
         self.emotion_mapping = {
@@ -32,13 +41,18 @@ class FacialEmotionDetector:
             'Surprise': (0, 255, 255)    # Yellow
         }
         
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        # Cascades keep this script's looser settings (minNeighbors=4, no minimum size)
+        cascade_options = {'min_neighbors': 4, 'min_size': (0, 0)} if face_backend in CASCADE_BACKENDS else {}
+        self.face_backend = create_face_backend(face_backend, **cascade_options)
 
     def process_image(self, 
                      image: Union[str, np.ndarray, Image.Image],
                      confidence_threshold: float = 0.5) -> Dict:
         """Process a single image and return emotion predictions"""
         
+        if self.fast is not None and isinstance(image, np.ndarray):
+            return self.process_faces([image], confidence_threshold)[0]
+
         # Convert input to PIL Image
         if isinstance(image, str):
             img = Image.open(image)
@@ -49,37 +63,62 @@ class FacialEmotionDetector:
         else:
             raise ValueError("Unsupported image format")
 
-        # Process image
-        inputs = self.processor(images=img, return_tensors="pt")
+        if self.fast is not None:
+            return self.process_faces([cv2.cvtColor(np.asarray(img.convert("RGB")), cv2.COLOR_RGB2BGR)],
+                                      confidence_threshold)[0]
+        return self._predict([img], confidence_threshold)[0]
+
+    def process_faces(self,
+                      rois: List[np.ndarray],
+                      confidence_threshold: float = 0.5) -> List[Dict]:
+        """Process several BGR face crops with one processor call and forward pass"""
+        if self.fast is not None:
+            probs = self.fast.predict(rois)
+            return self._to_results(probs, confidence_threshold)
+        images = [Image.fromarray(cv2.cvtColor(roi, cv2.COLOR_BGR2RGB)) for roi in rois]
+        results = []
+        for start in range(0, len(images), self.MAX_BATCH):
+            results.extend(self._predict(images[start:start + self.MAX_BATCH], confidence_threshold))
+        return results
+
+    def _predict(self, images: List[Image.Image], confidence_threshold: float) -> List[Dict]:
+        # Process images
+        inputs = self.processor(images=images, return_tensors="pt")
         
         # Get predictions
         with torch.no_grad():
             outputs = self.model(**inputs)
             probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
+        return self._to_results(probs, confidence_threshold)
 
-        # Get predicted class and probability
-        predicted_class = outputs.logits.argmax(-1).item()
-        confidence = probs[0][predicted_class].item()
-        
-        # Get all predictions above threshold
-        predictions = []
-        for idx, prob in enumerate(probs[0]):
-            score = prob.item()
-            if score >= confidence_threshold:
-                predictions.append({
-                    'emotion': self.emotion_mapping[idx],
-                    'confidence': score
-                })
-        
-        # Sort by confidence
-        predictions.sort(key=lambda x: x['confidence'], reverse=True)
-        
-        return {
-            'top_emotion': self.emotion_mapping[predicted_class],
-            'confidence': confidence,
-            'all_emotions': predictions,
-            'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-        }
+    def _to_results(self, probs: torch.Tensor, confidence_threshold: float) -> List[Dict]:
+        timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        results = []
+        for face_probs in probs:
+            # Get predicted class and probability (softmax keeps the logits' argmax)
+            predicted_class = face_probs.argmax(-1).item()
+            confidence = face_probs[predicted_class].item()
+            
+            # Get all predictions above threshold
+            predictions = []
+            for idx, prob in enumerate(face_probs):
+                score = prob.item()
+                if score >= confidence_threshold:
+                    predictions.append({
+                        'emotion': self.emotion_mapping[idx],
+                        'confidence': score
+                    })
+            
+            # Sort by confidence
+            predictions.sort(key=lambda x: x['confidence'], reverse=True)
+            
+            results.append({
+                'top_emotion': self.emotion_mapping[predicted_class],
+                'confidence': confidence,
+                'all_emotions': predictions,
+                'timestamp': timestamp
+            })
+        return results
 
     def process_video_stream(self, 
                            source: Union[int, str] = 0,
@@ -93,9 +132,8 @@ class FacialEmotionDetector:
             if not ret:
                 break
                 
-            # Convert to grayscale for face detection
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+            # Detect faces with the configured backend
+            faces = [(f['x'], f['y'], f['w'], f['h']) for f in self.face_backend.detect(frame)]
             
             # Add timestamp and user info to frame
             timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
@@ -104,14 +142,16 @@ class FacialEmotionDetector:
             cv2.putText(frame, "Current User's Login: danylog", 
                       (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
             
-            for (x, y, w, h) in faces:
-                # Extract face ROI
-                face_roi = frame[y:y+h, x:x+w]
-                
+            # Process all faces for emotion detection in one batch
+            try:
+                face_results = self.process_faces([frame[y:y+h, x:x+w] for (x, y, w, h) in faces],
+                                                  confidence_threshold)
+            except Exception as e:
+                print(f"Error processing faces: {str(e)}")
+                face_results = []
+            
+            for (x, y, w, h), results in zip(faces, face_results):
                 try:
-                    # Process face for emotion detection
-                    results = self.process_image(face_roi, confidence_threshold)
-                    
                     if display_results:
                         # Get color for detected emotion
                         emotion_color = self.emotion_colors[results['top_emotion']]
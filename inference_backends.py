@@ -0,0 +1,317 @@
+"""
+One interface over the emotion models this project has used:
+
+    tflite    no_graphic.py     tflite_runtime, emotion-tflite / model.tflite (FER2013 CNN)
+    keras     internet_fer.py   tensorflow.keras, emotion-keras / emotion_model.hdf5 (same CNN)
+    onnx      onnx_fer.py       onnxruntime, emotion-onnx / emotion_model.onnx (same CNN, see onnx_export.py)
+    tf1graph  picamera.py       TF1 GraphDef, retrained_data/retrained_graph.pb
+    siglip    test2.py          HF SigLIP2 classifier (torch + transformers)
+    cascade   fastest CNN above, SigLIP only for uncertain crops
+
+Every backend implements `process_face(roi)` / `process_faces(rois)` on BGR
+crops and returns {'Happy', 'Normal', 'Sad'} scores, so the pipeline and
+classify_mood work unchanged. `select_inference_backend("auto")` times the
+available runtimes of the cheapest-to-load tier on a synthetic crop and keeps
+the fastest (TensorFlow is only imported if neither TFLite nor ONNX loads); a
+name (or the ESPEJITO_INFERENCE environment variable) forces one.
+"""
+import importlib
+import importlib.util
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from face_backends import create_face_backend
+from model_registry import model_available
+from mood import classify_mood, mood_boundary_distance
+
+INFERENCE_ENV = "ESPEJITO_INFERENCE"
+
+
+class InferenceBackend:
+    name = "base"
+    requires: Sequence[str] = ()     # importable modules
+    model_files: Sequence[str] = ()  # files that must exist (relative to the cwd, like the detectors load them)
+    auto_select = True               # considered by select_inference_backend("auto")
+    cost = 0                         # load cost tier; "auto" only tries a tier if every cheaper one failed
+
+    @classmethod
+    def available(cls) -> bool:
+        return (all(importlib.util.find_spec(module) is not None for module in cls.requires)
+                and all(os.path.exists(path) for path in cls.model_files))
+
+    def process_face(self, face_roi: np.ndarray) -> Dict[str, float]:
+        return self.process_faces([face_roi])[0]
+
+    def process_faces(self, face_rois: List[np.ndarray]) -> List[Dict[str, float]]:
+        raise NotImplementedError
+
+
+class DetectorClassBackend(InferenceBackend):
+    """Reuses the model code of one of the CameraFacialEmotionDetector scripts."""
+    module = ""
+    detector_kwargs: Dict[str, object] = {}
+    model: Optional[Tuple[str, str]] = None  # (model_registry name, fallback path)
+
+    @classmethod
+    def available(cls) -> bool:
+        return super().available() and (cls.model is None or model_available(*cls.model))
+
+    def __init__(self):
+        detector_class = getattr(importlib.import_module(self.module), "CameraFacialEmotionDetector")
+        # Model only: EmotionDetector owns the face detector
+        self.detector = detector_class(face_backend=None, **self.detector_kwargs)
+
+    def process_faces(self, face_rois):
+        return self.detector.process_faces(face_rois)
+
+
+class TFLiteBackend(DetectorClassBackend):
+    name = "tflite"
+    module = "no_graphic"
+    requires = ("tflite_runtime",)
+    model = ("emotion-tflite", "model.tflite")
+
+
+class KerasBackend(DetectorClassBackend):
+    name = "keras"
+    module = "internet_fer"
+    requires = ("tensorflow",)
+    model = ("emotion-keras", "emotion_model.hdf5")
+    cost = 1  # imports TensorFlow
+
+
+class OnnxBackend(DetectorClassBackend):
+    name = "onnx"
+    module = "onnx_fer"
+    requires = ("onnxruntime",)
+    model = ("emotion-onnx", "emotion_model.onnx")
+
+
+class SiglipBackend(DetectorClassBackend):
+    """
+    SigLIP2 classifier collapsed to Happy / Normal / Sad (Neutral counts as
+    Normal). Much slower than the CNNs, so it is only used when named.
+    """
+    name = "siglip"
+    module = "test2"
+    requires = ("torch", "transformers")
+    detector_kwargs = {'fast': True}
+    auto_select = False
+    cost = 2
+
+    def process_faces(self, face_rois):
+        results = []
+        for result in self.detector.process_faces(face_rois):
+            scores = {'Happy': 0.0, 'Normal': 0.0, 'Sad': 0.0}
+            for entry in result['all_emotions']:
+                key = 'Normal' if entry['emotion'] == 'Neutral' else entry['emotion']
+                if key in scores:
+                    scores[key] += entry['confidence']
+            total = sum(scores.values())
+            results.append({k: v / total for k, v in scores.items()} if total > 0 else scores)
+        return results
+
+
+class TF1GraphBackend(InferenceBackend):
+    """The retrained TF1 graph from picamera.py, run through tf.compat.v1."""
+    name = "tf1graph"
+    requires = ("tensorflow",)
+    cost = 1
+    GRAPH_PATH = "./retrained_data/retrained_graph.pb"
+    LABELS_PATH = "./retrained_data/retrained_labels.txt"
+    model_files = (GRAPH_PATH, LABELS_PATH)
+    # retrained label name -> mood score it contributes to
+    LABEL_TO_SCORE = {'happy': 'Happy', 'neutral': 'Normal', 'normal': 'Normal', 'sad': 'Sad', 'fear': 'Sad'}
+
+    def __init__(self):
+        import tensorflow as tf
+        tf1 = tf.compat.v1
+        with open(self.LABELS_PATH) as f:
+            self.labels = [line.strip().lower() for line in f if line.strip()]
+        graph_def = tf1.GraphDef()
+        with open(self.GRAPH_PATH, "rb") as f:
+            graph_def.ParseFromString(f.read())
+        graph = tf.Graph()
+        with graph.as_default():
+            tf1.import_graph_def(graph_def, name='')
+        self.session = tf1.Session(graph=graph)
+        self.softmax = graph.get_tensor_by_name('final_result:0')
+
+    def process_faces(self, face_rois):
+        results = []
+        for face_roi in face_rois:
+            # The graph decodes a single JPEG-like HxWx3 image per run
+            rgb = cv2.cvtColor(face_roi, cv2.COLOR_BGR2RGB)
+            preds = self.session.run(self.softmax, {'DecodeJpeg:0': rgb})[0]
+            scores = {'Happy': 0.0, 'Normal': 0.0, 'Sad': 0.0}
+            for label, p in zip(self.labels, preds):
+                if label in self.LABEL_TO_SCORE:
+                    scores[self.LABEL_TO_SCORE[label]] += float(p)
+            total = sum(scores.values())
+            results.append({k: v / total for k, v in scores.items()} if total > 0 else scores)
+        return results
+
+
+class CascadeBackend(InferenceBackend):
+    """
+    Runs the fastest CNN backend on every crop and re-runs only the uncertain
+    ones through SigLIP: crops whose top-two score margin is under
+    `min_margin`, or whose scores lie within `boundary_band` of a
+    classify_mood threshold (where a small error flips the mood).
+    """
+    name = "cascade"
+    requires = SiglipBackend.requires
+    auto_select = False
+    cost = 2
+
+    def __init__(self, min_margin: float = 0.2, boundary_band: float = 0.03, cheap: Optional[str] = None):
+        self.min_margin = min_margin
+        self.boundary_band = boundary_band
+        self.cheap = create_inference_backend(cheap) if cheap else fastest_inference_backend()
+        self.expert = SiglipBackend()
+        print(f"[DEBUG] Cascade: {self.cheap.name} first, {self.expert.name} when uncertain")
+        self.faces = 0
+        self.escalated = 0
+        self.cheap_time = 0.0
+        self.expert_time = 0.0
+        self._lock = threading.Lock()
+
+    def _uncertain(self, scores: Dict[str, float]) -> bool:
+        top, second = sorted(scores.values(), reverse=True)[:2]
+        if top - second < self.min_margin:
+            return True
+        return mood_boundary_distance(scores['Happy'], scores['Normal'], scores['Sad']) < self.boundary_band
+
+    def process_faces(self, face_rois):
+        start = time.perf_counter()
+        results = self.cheap.process_faces(face_rois)
+        cheap_time = time.perf_counter() - start
+        uncertain = [i for i, scores in enumerate(results) if self._uncertain(scores)]
+        expert_time = 0.0
+        if uncertain:
+            start = time.perf_counter()
+            for i, scores in zip(uncertain, self.expert.process_faces([face_rois[i] for i in uncertain])):
+                results[i] = scores
+            expert_time = time.perf_counter() - start
+        with self._lock:
+            self.faces += len(face_rois)
+            self.escalated += len(uncertain)
+            self.cheap_time += cheap_time
+            self.expert_time += expert_time
+        return results
+
+    def stats(self) -> Dict[str, float]:
+        """Escalation rate and mean per-face latency of each tier in ms."""
+        return {
+            'faces': self.faces,
+            'escalated': self.escalated,
+            'escalation_rate': self.escalated / self.faces if self.faces else 0.0,
+            'cheap_ms': 1000.0 * self.cheap_time / self.faces if self.faces else 0.0,
+            'expert_ms': 1000.0 * self.expert_time / self.escalated if self.escalated else 0.0,
+        }
+
+
+INFERENCE_BACKENDS = {
+    backend.name: backend
+    for backend in (TFLiteBackend, OnnxBackend, KerasBackend, TF1GraphBackend, SiglipBackend, CascadeBackend)
+}
+
+
+def create_inference_backend(name: str) -> InferenceBackend:
+    """Instantiate a backend from INFERENCE_BACKENDS by name."""
+    if name not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend: {name} (choose from {', '.join(INFERENCE_BACKENDS)})")
+    return INFERENCE_BACKENDS[name]()
+
+
+def benchmark_inference(backend: InferenceBackend, runs: int = 5) -> float:
+    """Median process_face latency in ms on a synthetic 96x96 crop, after one warm-up call."""
+    crop = np.random.default_rng(0).integers(0, 256, (96, 96, 3), dtype=np.uint8)
+    backend.process_face(crop)
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        backend.process_face(crop)
+        latencies.append(time.perf_counter() - start)
+    return 1000.0 * float(np.median(latencies))
+
+
+def fastest_inference_backend(candidates: Optional[Sequence[str]] = None, runs: int = 5) -> InferenceBackend:
+    """
+    The lowest-latency backend among `candidates` (default: every
+    auto-selectable backend) that is installed and loads. Candidates are
+    tried by cost tier and heavier tiers are skipped once one loads, so
+    e.g. TensorFlow is never imported when TFLite or ONNX works.
+    """
+    names = candidates or [name for name, b in INFERENCE_BACKENDS.items() if b.auto_select]
+    best = None
+    for cost in sorted({INFERENCE_BACKENDS[name].cost for name in names}):
+        for name in (n for n in names if INFERENCE_BACKENDS[n].cost == cost):
+            if not INFERENCE_BACKENDS[name].available():
+                print(f"[DEBUG] Inference backend {name}: not available")
+                continue
+            try:
+                backend = create_inference_backend(name)
+                latency = benchmark_inference(backend, runs)
+            except Exception as e:
+                print(f"[DEBUG] Inference backend {name}: failed to load ({e})")
+                continue
+            print(f"[DEBUG] Inference backend {name}: {latency:.1f} ms/face")
+            if best is None or latency < best[0]:
+                best, loser = (latency, backend), (best[1] if best is not None else None)
+            else:
+                loser = backend
+            # Free the slower model now rather than whenever it gets collected
+            del backend, loser
+        if best is not None:
+            skipped = [n for n in names if INFERENCE_BACKENDS[n].cost > cost]
+            if skipped:
+                print(f"[DEBUG] Not trying heavier inference backends: {', '.join(skipped)}")
+            return best[1]
+    raise RuntimeError(f"No inference backend available (tried {', '.join(names)})")
+
+
+def select_inference_backend(preferred: str = "auto", candidates: Optional[Sequence[str]] = None,
+                             runs: int = 5) -> InferenceBackend:
+    """
+    Return the backend named by ESPEJITO_INFERENCE or `preferred`, or with
+    "auto" the fastest one (see fastest_inference_backend).
+    """
+    choice = os.environ.get(INFERENCE_ENV) or preferred
+    if choice != "auto":
+        print(f"[DEBUG] Using inference backend {choice} (forced)")
+        return create_inference_backend(choice)
+    backend = fastest_inference_backend(candidates, runs)
+    print(f"[DEBUG] Using inference backend {backend.name}")
+    return backend
+
+
+class EmotionDetector:
+    """
+    Detector with the same interface as the CameraFacialEmotionDetector
+    scripts, built from a face backend and the selected inference backend.
+    """
+
+    def __init__(self, inference: str = "auto", face_backend: str = "haar"):
+        self.inference = select_inference_backend(inference)
+        self.face_backend = create_face_backend(face_backend)
+
+    def detect_faces(self, frame: np.ndarray) -> List[Dict[str, int]]:
+        return self.face_backend.detect(frame)
+
+    def process_face(self, face_roi: np.ndarray) -> Dict[str, float]:
+        return self.inference.process_face(face_roi)
+
+    def process_faces(self, face_rois: List[np.ndarray]) -> List[Dict[str, float]]:
+        return self.inference.process_faces(face_rois)
+
+    def classify_mood(self, happy, normal, sad) -> str:
+        return classify_mood(happy, normal, sad)
+
+    def stats(self) -> Dict[str, float]:
+        return self.inference.stats() if hasattr(self.inference, "stats") else {}
@@ -1,95 +1,81 @@
 import cv2
 import numpy as np
-import os
-import time
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from tensorflow.keras.models import load_model
 
+from camera_service import get_camera_service
+from face_backends import create_face_backend
+from model_registry import ModelArtifact, resolve_model
+from mood import classify_mood, mood_scores
+from pipeline import Pipeline, camera_source, detector_stages
+
 class CameraFacialEmotionDetector:
+    MODEL_NAME = "emotion-keras"
     MODEL_PATH = "emotion_model.hdf5"  # <-- your .h5 Keras model here
     FACE_SIZE = (64, 64)
+    MAX_BATCH = 8  # faces per forward pass in process_faces
 
-    def __init__(self):
-        print("[DEBUG] Loading emotion Keras model from:", self.MODEL_PATH)
-        self.model = load_model(self.MODEL_PATH, compile=False)
-        print("[DEBUG] Loading Haar cascade for face detection...")
-        haar_path = (
-            "/home/pi/haarcascade_frontalface_default.xml"
-            if os.path.exists("/home/pi/haarcascade_frontalface_default.xml")
-            else cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-        )
-        self.face_cascade = cv2.CascadeClassifier(haar_path)
+    def __init__(self, face_backend: Optional[str] = "haar", model_path: Optional[str] = None):
+        # Active registry version (model_registry.py), else MODEL_PATH; an explicit model_path wins
+        self.model_artifact = (resolve_model(self.MODEL_NAME, self.MODEL_PATH) if model_path is None
+                               else ModelArtifact(self.MODEL_NAME, "explicit", model_path, {}))
+        self.mood_mapping = self.model_artifact.mood_mapping
+        model_path = self.model_artifact.path
+        print("[DEBUG] Loading emotion Keras model from:", model_path)
+        self.model = load_model(model_path, compile=False)
+        self._batch = np.zeros((self.MAX_BATCH, 64, 64, 1), dtype="float32")
+        # None: model only, for inference_backends.py, which brings its own face detector
+        self.face_backend = None
+        if face_backend is not None:
+            print(f"[DEBUG] Loading {face_backend} backend for face detection...")
+            self.face_backend = create_face_backend(face_backend)
         print("[DEBUG] Initialization complete.")
 
     def detect_faces(self, frame: np.ndarray) -> List[Dict[str, int]]:
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(
-            gray, scaleFactor=1.1, minNeighbors=3, minSize=(48, 48)
-        )
-        return [{'x': x, 'y': y, 'w': w, 'h': h} for (x, y, w, h) in faces]
+        return self.face_backend.detect(frame)
 
-    def process_face(self, face_roi: np.ndarray) -> Dict[str, float]:
-        gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
-        resized = cv2.resize(gray, self.FACE_SIZE)
-        normalized = resized.astype("float32") / 255.0
-        reshaped = np.reshape(normalized, (1, 64, 64, 1))
+    def _fill_batch(self, face_rois: List[np.ndarray]) -> np.ndarray:
+        """Grayscale, resize and normalize each crop into the preallocated batch."""
+        for i, face_roi in enumerate(face_rois):
+            gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
+            slot = self._batch[i, :, :, 0]
+            slot[:] = cv2.resize(gray, self.FACE_SIZE)
+            slot /= 255.0
+        return self._batch[:len(face_rois)]
 
-        preds = self.model.predict(reshaped, verbose=0)[0]  # FER2013: [Angry, Disgust, Fear, Happy, Sad, Surprise, Neutral]
+    def process_face(self, face_roi: np.ndarray) -> Dict[str, float]:
+        return self.process_faces([face_roi])[0]
 
-        happy = preds[3]
-        normal = preds[6]
-        sad = preds[2] + preds[4]  # Fear + Sad (adjust if needed)
-        total = happy + normal + sad
-        if total > 0:
-            happy /= total
-            normal /= total
-            sad /= total
-        return {
-            'Happy': float(happy),
-            'Normal': float(normal),
-            'Sad': float(sad),
-        }
+    def process_faces(self, face_rois: List[np.ndarray]) -> List[Dict[str, float]]:
+        """Run all face crops through a single forward pass per MAX_BATCH crops."""
+        results = []
+        for start in range(0, len(face_rois), self.MAX_BATCH):
+            chunk = face_rois[start:start + self.MAX_BATCH]
+            batch = self._fill_batch(chunk)
+            preds = self.model.predict(batch, verbose=0)
+            results.extend(mood_scores(p, self.mood_mapping) for p in preds)
+        return results
 
     def classify_mood(self, happy, normal, sad) -> str:
-        # New thresholds based on your provided values
-        if happy >= 0.8:
-            return "MUY FELIZ"
-        elif happy >= 0.12 and sad < 0.4:
-            return "FELIZ"
-        elif happy < 0.05 and (0.75 > sad >= 0.55):
-            return "TRISTE"
-        elif happy < 0.05 and sad >= 0.75:
-            return "MUY TRISTE"
-        else:
-            return "NORMAL"
+        return classify_mood(happy, normal, sad)
 
     def analyze_camera_feed(self):
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            raise RuntimeError("Cannot open camera")
+        camera = get_camera_service().acquire()
+        pipeline = Pipeline(camera_source(camera), detector_stages(self), self._print_result)
         try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                frame = cv2.resize(frame, (320, 240))
-                faces = self.detect_faces(frame)
-                timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-
-                if faces:
-                    f = max(faces, key=lambda r: r['w'] * r['h'])
-                    x, y, w, h = f['x'], f['y'], f['w'], f['h']
-                    face_roi = frame[y:y+h, x:x+w]
-                    emo = self.process_face(face_roi)
-                    mood = self.classify_mood(emo['Happy'], emo['Normal'], emo['Sad'])
-                    print(f"{timestamp} | {mood} | H:{emo['Happy']:.2f} N:{emo['Normal']:.2f} S:{emo['Sad']:.2f}")
-                else:
-                    print(f"{timestamp} | No face detected")
-                time.sleep(1)
+            pipeline.run()
         finally:
-            cap.release()
+            camera.release()
+
+    def _print_result(self, item):
+        timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        emo = item['emotions']
+        if emo is not None:
+            print(f"{timestamp} | {item['mood']} | H:{emo['Happy']:.2f} N:{emo['Normal']:.2f} S:{emo['Sad']:.2f}")
+        else:
+            print(f"{timestamp} | No face detected")
 
 if __name__ == "__main__":
     detector = CameraFacialEmotionDetector()
@@ -0,0 +1,227 @@
+"""
+Versioned store for the emotion model files.
+
+    models/
+        registry.json
+        emotion-tflite/3/model_int8.tflite
+        emotion-keras/1/emotion_model.hdf5
+        ...
+
+registry.json maps each model name to its versions and the active one.
+Every version records the file, its sha256 and metadata: format, input
+shape, label order and the label -> mood mapping used to collapse the
+output to Happy / Normal / Sad. Detectors ask for a name
+(`resolve_model("emotion-tflite", fallback)`) and get the active
+version's file, so swapping a model is a registry command, not a code edit:
+
+    python model_registry.py register emotion-tflite model_int8.tflite --activate
+    python model_registry.py activate emotion-tflite 2
+    python model_registry.py list
+    python model_registry.py verify
+
+TFLite models are opened by path, which the runtime memory-maps, so every
+worker process (and every interpreter in a pool) shares the same read-only
+pages instead of holding a private copy; never switch to model_content.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from mood import FER2013_LABELS, FER_MOOD_MAPPING
+
+REGISTRY_ROOT = os.environ.get("ESPEJITO_MODELS", "models")
+REGISTRY_FILE = "registry.json"
+
+FORMATS = {'.tflite': "tflite", '.hdf5': "keras", '.h5': "keras", '.onnx': "onnx", '.pb': "graphdef"}
+
+
+def sha256sum(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelArtifact:
+    """One registered model version: absolute path plus its metadata."""
+
+    def __init__(self, name: str, version: str, path: str, metadata: Dict[str, Any]):
+        self.name = name
+        self.version = version
+        self.path = path
+        self.metadata = metadata
+
+    @property
+    def mood_mapping(self) -> Dict[str, List[int]]:
+        return self.metadata.get('mood_mapping', FER_MOOD_MAPPING)
+
+    def __repr__(self):
+        return f"ModelArtifact({self.name} v{self.version}, {self.path})"
+
+
+class ModelRegistry:
+    def __init__(self, root: str = REGISTRY_ROOT):
+        self.root = root
+        self._verified = {}  # path -> (mtime, size) that matched the checksum
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.root, REGISTRY_FILE)
+
+    def _load(self) -> Dict[str, Any]:
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    def _save(self, index: Dict[str, Any]):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def register(self, name: str, source: str, version: Optional[str] = None, activate: bool = False,
+                 input_shape: Optional[List[int]] = None, labels: Optional[List[str]] = None,
+                 mood_mapping: Optional[Dict[str, List[int]]] = None, **extra) -> ModelArtifact:
+        """Copy `source` into the registry as a new version of `name`."""
+        index = self._load()
+        entry = index.setdefault(name, {'active': None, 'versions': {}})
+        if version is None:
+            version = str(max((int(v) for v in entry['versions'] if v.isdigit()), default=0) + 1)
+        if version in entry['versions']:
+            raise ValueError(f"{name} version {version} already registered")
+        relative = os.path.join(name, version, os.path.basename(source))
+        destination = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.copy2(source, destination)
+        metadata = {
+            'file': relative,
+            'sha256': sha256sum(destination),
+            'format': FORMATS.get(os.path.splitext(source)[1].lower(), "unknown"),
+            'input_shape': input_shape or [1, 64, 64, 1],
+            'labels': labels or list(FER2013_LABELS),
+            'mood_mapping': mood_mapping or FER_MOOD_MAPPING,
+            'registered': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        metadata.update(extra)
+        entry['versions'][version] = metadata
+        if activate or entry['active'] is None:
+            entry['active'] = version
+        self._save(index)
+        print(f"[DEBUG] Registered {name} v{version} -> {destination}")
+        return ModelArtifact(name, version, os.path.abspath(destination), metadata)
+
+    def activate(self, name: str, version: str):
+        index = self._load()
+        if name not in index or version not in index[name]['versions']:
+            raise KeyError(f"Unknown model {name} v{version}")
+        index[name]['active'] = version
+        self._save(index)
+
+    def resolve(self, name: str, version: Optional[str] = None, verify: bool = True) -> ModelArtifact:
+        """The requested (default: active) version of `name`, checksum-verified."""
+        entry = self._load().get(name)
+        if entry is None:
+            raise KeyError(f"Model {name} is not registered in {self.index_path}")
+        version = version or entry['active']
+        metadata = entry['versions'][version]
+        path = os.path.abspath(os.path.join(self.root, metadata['file']))
+        if verify:
+            self._verify(path, metadata['sha256'])
+        return ModelArtifact(name, version, path, metadata)
+
+    def _verify(self, path: str, expected: str):
+        stat = os.stat(path)
+        key = (stat.st_mtime, stat.st_size)
+        with self._lock:
+            if self._verified.get(path) == key:
+                return
+        if sha256sum(path) != expected:
+            raise ValueError(f"Checksum mismatch for {path}")
+        with self._lock:
+            self._verified[path] = key
+
+    def models(self) -> Dict[str, Any]:
+        return self._load()
+
+
+_registry = None
+
+
+def get_registry() -> ModelRegistry:
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
+
+
+def resolve_model(name: str, fallback_path: str) -> ModelArtifact:
+    """
+    The active registered version of `name`, or `fallback_path` with default
+    FER2013 metadata if the model was never registered (plain checkouts).
+    """
+    try:
+        artifact = get_registry().resolve(name)
+    except KeyError:
+        return ModelArtifact(name, "unregistered", fallback_path, {})
+    print(f"[DEBUG] Model {name} v{artifact.version}: {artifact.path}")
+    return artifact
+
+
+def model_available(name: str, fallback_path: str) -> bool:
+    entry = get_registry().models().get(name)
+    if entry is not None and entry['active'] is not None:
+        return os.path.exists(os.path.join(get_registry().root, entry['versions'][entry['active']]['file']))
+    return os.path.exists(fallback_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the versioned model registry")
+    sub = parser.add_subparsers(dest="command", required=True)
+    reg = sub.add_parser("register", help="add a model file as a new version")
+    reg.add_argument("name")
+    reg.add_argument("file")
+    reg.add_argument("--version")
+    reg.add_argument("--activate", action="store_true")
+    reg.add_argument("--input-shape", type=int, nargs="+")
+    act = sub.add_parser("activate", help="make a version the active one")
+    act.add_argument("name")
+    act.add_argument("version")
+    sub.add_parser("list")
+    sub.add_parser("verify", help="check every registered file against its checksum")
+    args = parser.parse_args()
+
+    registry = get_registry()
+    if args.command == "register":
+        registry.register(args.name, args.file, args.version, args.activate, args.input_shape)
+    elif args.command == "activate":
+        registry.activate(args.name, args.version)
+    elif args.command == "list":
+        for name, entry in sorted(registry.models().items()):
+            for version, meta in sorted(entry['versions'].items()):
+                marker = "*" if version == entry['active'] else " "
+                print(f"{marker} {name:<16} v{version:<4} {meta['format']:<8} {meta['sha256'][:12]}  {meta['file']}")
+    elif args.command == "verify":
+        failed = False
+        for name, entry in sorted(registry.models().items()):
+            for version in sorted(entry['versions']):
+                try:
+                    registry.resolve(name, version)
+                    print(f"ok      {name} v{version}")
+                except (OSError, ValueError) as e:
+                    failed = True
+                    print(f"FAILED  {name} v{version}: {e}")
+        if failed:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
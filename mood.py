@@ -0,0 +1,57 @@
+from typing import Dict, Sequence
+
+import numpy as np
+
+MOODS = ("MUY FELIZ", "FELIZ", "NORMAL", "TRISTE", "MUY TRISTE")
+
+# FER2013 output order of the small CNN (emotion_model.hdf5 / model.tflite)
+FER2013_LABELS = ("Angry", "Disgust", "Fear", "Happy", "Sad", "Surprise", "Neutral")
+FER_HAPPY = (3,)
+FER_NORMAL = (6,)
+FER_SAD = (2, 4)  # Fear + Sad (adjust if needed)
+FER_MOOD_MAPPING = {'Happy': FER_HAPPY, 'Normal': FER_NORMAL, 'Sad': FER_SAD}
+
+
+def mood_scores(preds: np.ndarray, mapping: Dict[str, Sequence[int]]) -> Dict[str, float]:
+    """Sum class scores per mood as given by `mapping` and renormalize over the three."""
+    scores = {mood: float(sum(preds[i] for i in indices)) for mood, indices in mapping.items()}
+    total = sum(scores.values())
+    if total > 0:
+        scores = {mood: value / total for mood, value in scores.items()}
+    return scores
+
+
+def fer2013_to_mood_scores(preds: np.ndarray) -> Dict[str, float]:
+    """Collapse FER2013 class scores to renormalized Happy / Normal / Sad."""
+    return mood_scores(preds, FER_MOOD_MAPPING)
+
+
+# classify_mood thresholds
+VERY_HAPPY = 0.8
+HAPPY = 0.12
+HAPPY_MAX_SAD = 0.4
+SAD_MAX_HAPPY = 0.05
+SAD = 0.55
+VERY_SAD = 0.75
+
+
+def classify_mood(happy, normal, sad) -> str:
+    # New thresholds based on your provided values
+    if happy >= VERY_HAPPY:
+        return "MUY FELIZ"
+    elif happy >= HAPPY and sad < HAPPY_MAX_SAD:
+        return "FELIZ"
+    elif happy < SAD_MAX_HAPPY and (VERY_SAD > sad >= SAD):
+        return "TRISTE"
+    elif happy < SAD_MAX_HAPPY and sad >= VERY_SAD:
+        return "MUY TRISTE"
+    else:
+        return "NORMAL"
+
+
+def mood_boundary_distance(happy, normal, sad) -> float:
+    """How far the scores are from the nearest classify_mood threshold (0 = on a boundary)."""
+    return min(
+        min(abs(happy - t) for t in (VERY_HAPPY, HAPPY, SAD_MAX_HAPPY)),
+        min(abs(sad - t) for t in (HAPPY_MAX_SAD, SAD, VERY_SAD)),
+    )
@@ -0,0 +1,87 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Cheap scene-change test in front of face detection and emotion inference.
+
+    Each frame is reduced to a tiny blurred grayscale thumbnail and compared
+    with the thumbnail of the last frame that was actually processed, by mean
+    absolute pixel difference and by the L1 distance of their intensity
+    histograms. While both stay under their thresholds the scene counts as
+    static and the last result can be reused. Comparing against the last
+    processed frame (not the previous one) means slow drifts still add up
+    and trigger a refresh; `max_static_seconds` forces one regardless.
+    """
+
+    def __init__(self, diff_threshold: float = 4.0, hist_threshold: float = 0.08,
+                 thumb_size=(32, 24), hist_bins: int = 16, max_static_seconds: float = 5.0):
+        self.diff_threshold = diff_threshold
+        self.hist_threshold = hist_threshold
+        self.thumb_size = thumb_size
+        self.hist_bins = hist_bins
+        self.max_static_seconds = max_static_seconds
+        self.processed = 0
+        self.skipped = 0
+        self.last_diff = 0.0
+        self.last_hist_distance = 0.0
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._reference = None
+        self._reference_hist = None
+        self._reference_time = 0.0
+        self._lock = threading.Lock()
+
+    def _thumbnail(self, frame: np.ndarray):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        thumb = cv2.resize(gray, self.thumb_size, interpolation=cv2.INTER_AREA)
+        thumb = cv2.GaussianBlur(thumb, (3, 3), 0)
+        hist = cv2.calcHist([thumb], [0], None, [self.hist_bins], [0, 256]).ravel()
+        return thumb, hist / max(1.0, float(hist.sum()))
+
+    def check(self, frame: np.ndarray) -> Tuple[bool, Any]:
+        """
+        (process, signature): process is True if the frame differs enough from
+        the last processed one (or there is no result yet). The reference only
+        moves when the result arrives, so pass the signature on to `remember`.
+        """
+        thumb, hist = self._thumbnail(frame)
+        now = time.monotonic()
+        with self._lock:
+            if self._reference is not None:
+                self.last_diff = float(cv2.absdiff(thumb, self._reference).mean())
+                self.last_hist_distance = float(np.abs(hist - self._reference_hist).sum())
+                static = (
+                    self.last_result is not None
+                    and self.last_diff < self.diff_threshold
+                    and self.last_hist_distance < self.hist_threshold
+                    and now - self._reference_time < self.max_static_seconds
+                )
+                if static:
+                    self.skipped += 1
+                    return False, None
+            self.processed += 1
+            return True, (thumb, hist, now)
+
+    def remember(self, result: Dict[str, Any], signature):
+        """Store the result of a processed frame and make that frame the reference."""
+        with self._lock:
+            # A slower worker finishing an older frame must not move the reference back
+            if self._reference is not None and signature[2] < self._reference_time:
+                return
+            self.last_result = result
+            self._reference, self._reference_hist, self._reference_time = signature
+
+    def stats(self) -> Dict[str, float]:
+        total = self.processed + self.skipped
+        return {
+            'processed': self.processed,
+            'skipped': self.skipped,
+            'skip_ratio': self.skipped / total if total else 0.0,
+            'last_diff': self.last_diff,
+            'last_hist_distance': self.last_hist_distance,
+        }
@@ -1,101 +1,185 @@
 import cv2
 import numpy as np
-import os
-import time
 from datetime import datetime
-from typing import List, Dict
+import queue
+from contextlib import contextmanager
+from typing import List, Dict, Optional
 
 import tflite_runtime.interpreter as tflite
 
-class CameraFacialEmotionDetector:
-    MODEL_PATH = "model.tflite"  # <-- your .tflite here
-    FACE_SIZE = (64, 64)
+from camera_service import get_camera_service
+from face_backends import create_face_backend
+from model_registry import ModelArtifact, resolve_model
+from mood import classify_mood, mood_scores
+from pipeline import Pipeline, camera_source, detector_stages
 
-    def __init__(self):
-        print("[DEBUG] Loading emotion TFLite model from:", self.MODEL_PATH)
-        self.interpreter = tflite.Interpreter(model_path=self.MODEL_PATH)
+class PooledInterpreter:
+    """
+    One interpreter plus the scratch buffers needed to feed it without
+    allocating: crops are resized into `small`, converted into `gray` and
+    written straight into the input tensor through an `interpreter.tensor()`
+    view. Views must be dropped before invoke(), so they are re-fetched per
+    call (a view object, not a copy of the data).
+    """
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = None, use_xnnpack: bool = True):
+        kwargs = {'model_path': model_path, 'num_threads': num_threads}
+        if not use_xnnpack and hasattr(tflite, "OpResolverType"):
+            # XNNPACK is the default delegate for float models in recent runtimes
+            kwargs['experimental_op_resolver_type'] = tflite.OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+        self.interpreter = tflite.Interpreter(**kwargs)
         self.interpreter.allocate_tensors()
         self.input_details = self.interpreter.get_input_details()
         self.output_details = self.interpreter.get_output_details()
-        print("[DEBUG] Loading Haar cascade for face detection...")
-        haar_path = (
-            "/home/pi/haarcascade_frontalface_default.xml"
-            if os.path.exists("/home/pi/haarcascade_frontalface_default.xml")
-            else cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-        )
-        self.face_cascade = cv2.CascadeClassifier(haar_path)
+        self.input_index = self.input_details[0]['index']
+        self.output_index = self.output_details[0]['index']
+        self.batch_size = 1
+        self.input = self.interpreter.tensor(self.input_index)
+        self.output = self.interpreter.tensor(self.output_index)
+        self.small = np.zeros((64, 64, 3), dtype=np.uint8)
+        self.gray = np.zeros((64, 64), dtype=np.uint8)
+        self.scratch = np.zeros((64, 64), dtype=np.float32)
+        self.scores = np.zeros(self.output_details[0]['shape'][-1], dtype=np.float32)
+
+    def resize_input(self, batch_size: int):
+        if batch_size != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input_index, [batch_size, 64, 64, 1])
+            self.interpreter.allocate_tensors()
+            self.input = self.interpreter.tensor(self.input_index)
+            self.output = self.interpreter.tensor(self.output_index)
+            self.batch_size = batch_size
+
+
+class InterpreterPool:
+    """
+    `size` interpreters on the same model so concurrent callers (e.g. a
+    pipeline stage with several workers) do not serialize on one.
+    """
+
+    def __init__(self, model_path: str, size: int = 1, num_threads: Optional[int] = None,
+                 use_xnnpack: bool = True):
+        self.interpreters = [PooledInterpreter(model_path, num_threads, use_xnnpack) for _ in range(size)]
+        self._free = queue.Queue()
+        for interpreter in self.interpreters:
+            self._free.put(interpreter)
+
+    @contextmanager
+    def borrow(self):
+        interpreter = self._free.get()
+        try:
+            yield interpreter
+        finally:
+            self._free.put(interpreter)
+
+
+class CameraFacialEmotionDetector:
+    MODEL_NAME = "emotion-tflite"
+    MODEL_PATH = "model.tflite"  # <-- your .tflite here
+    FACE_SIZE = (64, 64)
+    MAX_BATCH = 8  # faces per invoke in process_faces
+
+    def __init__(self, face_backend: Optional[str] = "haar", model_path: Optional[str] = None,
+                 num_threads: Optional[int] = None, use_xnnpack: bool = True, pool_size: int = 1):
+        # Active registry version (model_registry.py), else MODEL_PATH; an explicit model_path wins
+        self.model_artifact = (resolve_model(self.MODEL_NAME, self.MODEL_PATH) if model_path is None
+                               else ModelArtifact(self.MODEL_NAME, "explicit", model_path, {}))
+        self.mood_mapping = self.model_artifact.mood_mapping
+        model_path = self.model_artifact.path
+        print(f"[DEBUG] Loading emotion TFLite model from: {model_path} "
+              f"(threads={num_threads}, xnnpack={use_xnnpack}, pool={pool_size})")
+        self.pool = InterpreterPool(model_path, pool_size, num_threads, use_xnnpack)
+        first = self.pool.interpreters[0]
+        self.interpreter = first.interpreter
+        self.input_details = first.input_details
+        self.output_details = first.output_details
+        # (scale, zero_point); scale 0.0 means a float tensor (see tflite_conv.py for int8 models)
+        self._input_quant = self.input_details[0]['quantization']
+        self._output_quant = self.output_details[0]['quantization']
+        if self._input_quant[0]:
+            info = np.iinfo(self.input_details[0]['dtype'])
+            self._input_range = (info.min, info.max)
+        # Fused export (tflite_conv.py --fused): uint8 pixels in, [Happy, Normal, Sad] out
+        self.fused = self.output_details[0]['shape'][-1] == 3
+        if self.fused:
+            print("[DEBUG] Model has fused preprocessing, feeding raw uint8 crops.")
+        # None: model only, for inference_backends.py, which brings its own face detector
+        self.face_backend = None
+        if face_backend is not None:
+            print(f"[DEBUG] Loading {face_backend} backend for face detection...")
+            self.face_backend = create_face_backend(face_backend)
         print("[DEBUG] Initialization complete.")
 
     def detect_faces(self, frame: np.ndarray) -> List[Dict[str, int]]:
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(
-            gray, scaleFactor=1.1, minNeighbors=3, minSize=(48, 48)
-        )
-        return [{'x': x, 'y': y, 'w': w, 'h': h} for (x, y, w, h) in faces]
+        return self.face_backend.detect(frame)
+
+    def _fill_input(self, slot: PooledInterpreter, face_rois: List[np.ndarray]):
+        """Resize, grayscale and normalize each crop straight into the input tensor."""
+        # Resizing before the gray conversion keeps every buffer a fixed 64x64
+        tensor = slot.input()
+        for i, face_roi in enumerate(face_rois):
+            cv2.resize(face_roi, self.FACE_SIZE, dst=slot.small)
+            if self.fused:
+                # The model normalizes itself
+                cv2.cvtColor(slot.small, cv2.COLOR_BGR2GRAY, dst=tensor[i, :, :, 0])
+                continue
+            cv2.cvtColor(slot.small, cv2.COLOR_BGR2GRAY, dst=slot.gray)
+            scale, zero_point = self._input_quant
+            if not scale:
+                np.multiply(slot.gray, 1.0 / 255.0, out=tensor[i, :, :, 0], dtype=np.float32)
+                continue
+            # int8 model: q = x / scale + zero_point with x = pixel / 255
+            np.multiply(slot.gray, 1.0 / (255.0 * scale), out=slot.scratch, dtype=np.float32)
+            slot.scratch += zero_point
+            np.rint(slot.scratch, out=slot.scratch)
+            np.clip(slot.scratch, *self._input_range, out=slot.scratch)
+            tensor[i, :, :, 0] = slot.scratch
+        del tensor
+
+    def _to_mood_scores(self, slot: PooledInterpreter, preds: np.ndarray) -> Dict[str, float]:
+        scale, zero_point = self._output_quant
+        if scale:
+            np.subtract(preds, zero_point, out=slot.scores, dtype=np.float32)
+            slot.scores *= scale
+            preds = slot.scores
+        if self.fused:
+            return {'Happy': float(preds[0]), 'Normal': float(preds[1]), 'Sad': float(preds[2])}
+        return mood_scores(preds, self.mood_mapping)
 
     def process_face(self, face_roi: np.ndarray) -> Dict[str, float]:
-        gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
-        resized = cv2.resize(gray, self.FACE_SIZE)
-        normalized = resized.astype("float32") / 255.0
-        reshaped = np.reshape(normalized, (1, 64, 64, 1))
-
-        # Set tensor
-        self.interpreter.set_tensor(self.input_details[0]['index'], reshaped.astype(self.input_details[0]['dtype']))
-        self.interpreter.invoke()
-        preds = self.interpreter.get_tensor(self.output_details[0]['index'])[0]  # FER2013: [Angry, Disgust, Fear, Happy, Sad, Surprise, Neutral]
-
-        happy = preds[3]
-        normal = preds[6]
-        sad = preds[2] + preds[4]  # Fear + Sad (adjust if needed)
-        total = happy + normal + sad
-        if total > 0:
-            happy /= total
-            normal /= total
-            sad /= total
-        return {
-            'Happy': float(happy),
-            'Normal': float(normal),
-            'Sad': float(sad),
-        }
+        return self.process_faces([face_roi])[0]
+
+    def process_faces(self, face_rois: List[np.ndarray]) -> List[Dict[str, float]]:
+        """Run all face crops through a single invoke per MAX_BATCH crops."""
+        results = []
+        with self.pool.borrow() as slot:
+            for start in range(0, len(face_rois), self.MAX_BATCH):
+                chunk = face_rois[start:start + self.MAX_BATCH]
+                slot.resize_input(len(chunk))
+                self._fill_input(slot, chunk)
+                slot.interpreter.invoke()
+                preds = slot.output()
+                results.extend(self._to_mood_scores(slot, p) for p in preds)
+                del preds
+        return results
 
     def classify_mood(self, happy, normal, sad) -> str:
-        # New thresholds based on your provided values
-        if happy >= 0.8:
-            return "MUY FELIZ"
-        elif happy >= 0.12 and sad < 0.4:
-            return "FELIZ"
-        elif happy < 0.05 and (0.75 > sad >= 0.55):
-            return "TRISTE"
-        elif happy < 0.05 and sad >= 0.75:
-            return "MUY TRISTE"
-        else:
-            return "NORMAL"
+        return classify_mood(happy, normal, sad)
 
     def analyze_camera_feed(self):
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            raise RuntimeError("Cannot open camera")
+        camera = get_camera_service().acquire()
+        pipeline = Pipeline(camera_source(camera), detector_stages(self), self._print_result)
         try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                frame = cv2.resize(frame, (320, 240))
-                faces = self.detect_faces(frame)
-                timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-
-                if faces:
-                    f = max(faces, key=lambda r: r['w'] * r['h'])
-                    x, y, w, h = f['x'], f['y'], f['w'], f['h']
-                    face_roi = frame[y:y+h, x:x+w]
-                    emo = self.process_face(face_roi)
-                    mood = self.classify_mood(emo['Happy'], emo['Normal'], emo['Sad'])
-                    print(f"{timestamp} | {mood} | H:{emo['Happy']:.2f} N:{emo['Normal']:.2f} S:{emo['Sad']:.2f}")
-                else:
-                    print(f"{timestamp} | No face detected")
-                time.sleep(1)
+            pipeline.run()
         finally:
-            cap.release()
+            camera.release()
+
+    def _print_result(self, item):
+        timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        emo = item['emotions']
+        if emo is not None:
+            print(f"{timestamp} | {item['mood']} | H:{emo['Happy']:.2f} N:{emo['Normal']:.2f} S:{emo['Sad']:.2f}")
+        else:
+            print(f"{timestamp} | No face detected")
 
 if __name__ == "__main__":
     detector = CameraFacialEmotionDetector()
@@ -0,0 +1,134 @@
+"""
+Export emotion_model.hdf5 to ONNX for onnx_fer.py and compare it with Keras.
+
+    python onnx_export.py                          export + parity check
+    python onnx_export.py --compare                also latency / memory per runtime
+
+The parity check runs the same crops (a local folder of face crops, or
+random ones if the folder is missing) through Keras and onnxruntime and
+reports the largest score difference and top-class agreement. --compare
+measures each runtime in a fresh interpreter process, so import time and
+peak RSS are not polluted by the other runtime:
+
+    runtime   import s   load s   ms/face   peak RSS MB
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.bmp")
+FACE_SIZE = (64, 64)
+
+
+def load_crops(folder: str, limit: int = 200) -> np.ndarray:
+    """float32 (N, 64, 64, 1) crops in [0, 1], random if the folder has no images."""
+    crops = []
+    for pattern in IMAGE_PATTERNS:
+        for path in sorted(glob.glob(os.path.join(folder, "**", pattern), recursive=True))[:limit]:
+            image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if image is not None:
+                crops.append(cv2.resize(image, FACE_SIZE).astype("float32") / 255.0)
+    if not crops:
+        print(f"[DEBUG] No face crops in {folder}, using random inputs")
+        return np.random.default_rng(0).random((32,) + FACE_SIZE + (1,), dtype=np.float32)
+    return np.stack(crops[:limit])[..., None]
+
+
+def export(keras_path: str, onnx_path: str, opset: int):
+    import tensorflow as tf
+    import tf2onnx
+
+    model = tf.keras.models.load_model(keras_path, compile=False)
+    spec = (tf.TensorSpec((None,) + FACE_SIZE + (1,), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=onnx_path)
+    print(f"[DEBUG] Wrote {onnx_path} ({os.path.getsize(onnx_path) / 1024.0:.0f} KB)")
+    return model
+
+
+def parity(model, onnx_path: str, crops: np.ndarray):
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    expected = model.predict(crops, verbose=0)
+    actual = session.run(None, {session.get_inputs()[0].name: crops})[0]
+    max_diff = float(np.abs(expected - actual).max())
+    agreement = float((expected.argmax(axis=1) == actual.argmax(axis=1)).mean())
+    print(f"Parity on {len(crops)} crops: max |diff| {max_diff:.2e}, top-class agreement {100 * agreement:.1f}%")
+    return max_diff, agreement
+
+
+def measure(runtime: str, keras_path: str, onnx_path: str, runs: int):
+    """Run in a child process: time import, load and single-face inference, report peak RSS."""
+    crop = np.random.default_rng(0).random((1,) + FACE_SIZE + (1,), dtype=np.float32)
+    start = time.perf_counter()
+    if runtime == "keras":
+        import tensorflow as tf
+        imported = time.perf_counter()
+        model = tf.keras.models.load_model(keras_path, compile=False)
+        predict = lambda x: model(x, training=False)
+    else:
+        import onnxruntime as ort
+        imported = time.perf_counter()
+        session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+        name = session.get_inputs()[0].name
+        predict = lambda x: session.run(None, {name: x})
+    loaded = time.perf_counter()
+    predict(crop)
+    latencies = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        predict(crop)
+        latencies.append(time.perf_counter() - t)
+    print(json.dumps({
+        'import_s': imported - start,
+        'load_s': loaded - imported,
+        'ms_per_face': 1000.0 * float(np.median(latencies)),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    }))
+
+
+def compare(keras_path: str, onnx_path: str, runs: int):
+    print(f"{'runtime':<8} {'import s':>9} {'load s':>7} {'ms/face':>8} {'peak RSS MB':>12}")
+    for runtime in ("keras", "onnx"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--measure", runtime, "--model", keras_path,
+             "--onnx", onnx_path, "--runs", str(runs)],
+            capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            print(f"{runtime:<8} failed: {out.stderr.strip().splitlines()[-1:]}")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{runtime:<8} {r['import_s']:9.2f} {r['load_s']:7.2f} {r['ms_per_face']:8.2f} {r['peak_rss_mb']:12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the Keras emotion model to ONNX")
+    parser.add_argument("--model", default="emotion_model.hdf5")
+    parser.add_argument("--onnx", default="emotion_model.onnx")
+    parser.add_argument("--crops", default="fixtures/face_crops", help="folder of face crops for the parity check")
+    parser.add_argument("--opset", type=int, default=13)
+    parser.add_argument("--compare", action="store_true", help="also compare latency and memory per runtime")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--measure", choices=("keras", "onnx"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, args.model, args.onnx, args.runs)
+        return
+    model = export(args.model, args.onnx, args.opset)
+    parity(model, args.onnx, load_crops(args.crops))
+    if args.compare:
+        compare(args.model, args.onnx, args.runs)
+
+
+if __name__ == "__main__":
+    main()
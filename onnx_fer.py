@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+from datetime import datetime
+from typing import List, Dict, Optional
+
+import onnxruntime as ort
+
+from camera_service import get_camera_service
+from face_backends import create_face_backend
+from model_registry import ModelArtifact, resolve_model
+from mood import classify_mood, mood_scores
+from pipeline import Pipeline, camera_source, detector_stages
+
+class CameraFacialEmotionDetector:
+    MODEL_NAME = "emotion-onnx"
+    MODEL_PATH = "emotion_model.onnx"  # <-- exported with onnx_export.py
+    FACE_SIZE = (64, 64)
+    MAX_BATCH = 8  # faces per forward pass in process_faces
+
+    def __init__(self, face_backend: Optional[str] = "haar", model_path: Optional[str] = None):
+        # Active registry version (model_registry.py), else MODEL_PATH; an explicit model_path wins
+        self.model_artifact = (resolve_model(self.MODEL_NAME, self.MODEL_PATH) if model_path is None
+                               else ModelArtifact(self.MODEL_NAME, "explicit", model_path, {}))
+        self.mood_mapping = self.model_artifact.mood_mapping
+        model_path = self.model_artifact.path
+        print("[DEBUG] Loading emotion ONNX model from:", model_path)
+        self.session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self._batch = np.zeros((self.MAX_BATCH, 64, 64, 1), dtype="float32")
+        # None: model only, for inference_backends.py, which brings its own face detector
+        self.face_backend = None
+        if face_backend is not None:
+            print(f"[DEBUG] Loading {face_backend} backend for face detection...")
+            self.face_backend = create_face_backend(face_backend)
+        print("[DEBUG] Initialization complete.")
+
+    def detect_faces(self, frame: np.ndarray) -> List[Dict[str, int]]:
+        return self.face_backend.detect(frame)
+
+    def _fill_batch(self, face_rois: List[np.ndarray]) -> np.ndarray:
+        """Grayscale, resize and normalize each crop into the preallocated batch."""
+        for i, face_roi in enumerate(face_rois):
+            gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
+            slot = self._batch[i, :, :, 0]
+            slot[:] = cv2.resize(gray, self.FACE_SIZE)
+            slot /= 255.0
+        return self._batch[:len(face_rois)]
+
+    def process_face(self, face_roi: np.ndarray) -> Dict[str, float]:
+        return self.process_faces([face_roi])[0]
+
+    def process_faces(self, face_rois: List[np.ndarray]) -> List[Dict[str, float]]:
+        """Run all face crops through a single forward pass per MAX_BATCH crops."""
+        results = []
+        for start in range(0, len(face_rois), self.MAX_BATCH):
+            chunk = face_rois[start:start + self.MAX_BATCH]
+            batch = self._fill_batch(chunk)
+            preds = self.session.run(None, {self.input_name: batch})[0]
+            results.extend(mood_scores(p, self.mood_mapping) for p in preds)
+        return results
+
+    def classify_mood(self, happy, normal, sad) -> str:
+        return classify_mood(happy, normal, sad)
+
+    def analyze_camera_feed(self):
+        camera = get_camera_service().acquire()
+        pipeline = Pipeline(camera_source(camera), detector_stages(self), self._print_result)
+        try:
+            pipeline.run()
+        finally:
+            camera.release()
+
+    def _print_result(self, item):
+        timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        emo = item['emotions']
+        if emo is not None:
+            print(f"{timestamp} | {item['mood']} | H:{emo['Happy']:.2f} N:{emo['Normal']:.2f} S:{emo['Sad']:.2f}")
+        else:
+            print(f"{timestamp} | No face detected")
+
+if __name__ == "__main__":
+    detector = CameraFacialEmotionDetector()
+    print("Press 'q' to exit.")
+    detector.analyze_camera_feed()
\ No newline at end of file
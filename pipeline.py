@@ -0,0 +1,271 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+import cv2
+
+BLOCK = "block"              # producer waits for room (backpressure)
+DROP_OLDEST = "drop_oldest"  # full queue discards its oldest item
+LATEST_WINS = "latest_wins"  # queue holds a single item, replaced by newer ones
+POLICIES = (BLOCK, DROP_OLDEST, LATEST_WINS)
+
+
+class StageQueue:
+    """Bounded queue in front of a stage, with a configurable overflow policy."""
+
+    def __init__(self, maxsize: int = 2, policy: str = DROP_OLDEST):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.maxsize = 1 if policy == LATEST_WINS else max(1, maxsize)
+        self.policy = policy
+        self.items = deque()
+        self.dropped = 0
+        self.blocked = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def put(self, item) -> bool:
+        """Enqueue `item`; returns False if the queue was closed."""
+        with self._lock:
+            if len(self.items) >= self.maxsize:
+                if self.policy == BLOCK:
+                    self.blocked += 1
+                    while len(self.items) >= self.maxsize and not self.closed:
+                        self._not_full.wait()
+                else:
+                    self.items.popleft()
+                    self.dropped += 1
+            if self.closed:
+                return False
+            self.items.append(item)
+            self._not_empty.notify()
+            return True
+
+    def get(self, timeout: Optional[float] = None):
+        """Dequeue the next item, or return None on timeout/close."""
+        with self._lock:
+            if not self.items and not self.closed:
+                self._not_empty.wait(timeout)
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self._not_full.notify()
+            return item
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+
+class Stage:
+    """
+    One step of a pipeline: `func(item)` runs on `workers` threads fed by a
+    bounded queue. Returning None from `func` drops the item (e.g. no face).
+    """
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+                 workers: int = 1, queue_size: int = 2, policy: str = DROP_OLDEST):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue = StageQueue(queue_size, policy)
+        self.processed = 0
+        self.filtered = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self._stats_lock = threading.Lock()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'processed': self.processed,
+            'filtered': self.filtered,
+            'errors': self.errors,
+            'dropped': self.queue.dropped,
+            'blocked': self.queue.blocked,
+            'queued': len(self.queue),
+            'avg_ms': 1000.0 * self.busy_time / self.processed if self.processed else 0.0,
+        }
+
+
+class Pipeline:
+    """
+    Runs `source -> stages... -> sink` on separate threads.
+
+    `source()` is called in a loop and should block until it has the next
+    item (a dict), returning None when there is nothing to deliver. Each
+    item gets a 'seq' number; the sink only sees items in increasing order,
+    so results that overtake each other across workers are discarded.
+    """
+
+    def __init__(self, source: Callable[[], Optional[Dict[str, Any]]], stages: List[Stage],
+                 sink: Callable[[Dict[str, Any]], None]):
+        self.source = source
+        self.stages = stages
+        self.sink = sink
+        self.emitted = 0
+        self.delivered = 0
+        self.out_of_order = 0
+        self._last_delivered = 0
+        self._sink_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self._threads = [threading.Thread(target=self._source_loop, daemon=True)]
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                self._threads.append(threading.Thread(target=self._stage_loop, args=(index,), daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0):
+        self._running = False
+        for stage in self.stages:
+            stage.queue.close()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def run(self):
+        """Start the pipeline and block until interrupted."""
+        self.start()
+        try:
+            while self._running:
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _source_loop(self):
+        while self._running:
+            item = self.source()
+            if item is None:
+                continue
+            self.emitted += 1
+            item['seq'] = self.emitted
+            self._forward(0, item)
+
+    def _forward(self, index: int, item: Dict[str, Any]):
+        if index < len(self.stages):
+            self.stages[index].queue.put(item)
+            return
+        with self._sink_lock:
+            if item['seq'] <= self._last_delivered:
+                self.out_of_order += 1
+                return
+            self._last_delivered = item['seq']
+            self.delivered += 1
+            self.sink(item)
+
+    def _stage_loop(self, index: int):
+        stage = self.stages[index]
+        while self._running:
+            item = stage.queue.get(timeout=0.5)
+            if item is None:
+                continue
+            start = time.perf_counter()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                with stage._stats_lock:
+                    stage.errors += 1
+                print(f"[DEBUG] Pipeline stage '{stage.name}' failed: {e}")
+                continue
+            with stage._stats_lock:
+                stage.busy_time += time.perf_counter() - start
+                stage.processed += 1
+                if result is None:
+                    stage.filtered += 1
+            if result is not None:
+                self._forward(index + 1, result)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {stage.name: stage.stats() for stage in self.stages}
+        stats['pipeline'] = {
+            'emitted': self.emitted,
+            'delivered': self.delivered,
+            'out_of_order': self.out_of_order,
+        }
+        return stats
+
+
+def camera_source(camera, size=(320, 240), timeout: float = 1.0) -> Callable[[], Optional[Dict[str, Any]]]:
+    """Source that yields each new frame of a capture service, resized for detection."""
+    state = {'last_seq': 0}
+
+    def source():
+        packet = camera.wait_for_frame(state['last_seq'], timeout=timeout)
+        if packet is None:
+            return None
+        state['last_seq'] = packet.seq
+        return {
+            'frame': cv2.resize(packet.frame, size),
+            'timestamp': packet.timestamp,
+        }
+    return source
+
+
+def detector_stages(detector, detect_workers: int = 1, infer_workers: int = 1,
+                    policy: str = LATEST_WINS, all_faces: bool = False, gate=None) -> List[Stage]:
+    """
+    Wrap a detector class (anything with detect_faces/process_face/classify_mood)
+    as a detect stage and an inference stage working on the biggest face.
+    Items without a face still reach the sink with 'emotions' set to None.
+    With `all_faces`, every face goes through one `process_faces` batch and the
+    per-face scores land in 'face_emotions'; 'emotions' stays the biggest face's.
+    With a MotionGate as `gate`, frames of a static scene skip both stages and
+    carry the last result with 'reused' set to True.
+    Only use more than one infer worker if the detector's model is thread-safe.
+    """
+    result_keys = ('faces', 'face', 'face_emotions', 'emotions', 'mood')
+
+    def detect(item):
+        item['reused'] = False
+        if gate is not None:
+            process, item['gate_signature'] = gate.check(item['frame'])
+            if not process:
+                item.update(gate.last_result)
+                item['reused'] = True
+                return item
+        faces = detector.detect_faces(item['frame'])
+        item['faces'] = faces
+        item['face'] = max(faces, key=lambda f: f['w'] * f['h']) if faces else None
+        return item
+
+    def crop(frame, face):
+        x, y, w, h = face['x'], face['y'], face['w'], face['h']
+        return frame[y:y+h, x:x+w]
+
+    def infer(item):
+        if item['reused']:
+            return item
+        face = item['face']
+        item['emotions'] = None
+        item['mood'] = None
+        if face is not None:
+            if all_faces:
+                item['face_emotions'] = detector.process_faces([crop(item['frame'], f) for f in item['faces']])
+                emotions = item['face_emotions'][item['faces'].index(face)]
+            else:
+                emotions = detector.process_face(crop(item['frame'], face))
+            item['emotions'] = emotions
+            item['mood'] = detector.classify_mood(emotions['Happy'], emotions['Normal'], emotions['Sad'])
+        if gate is not None:
+            gate.remember({key: item[key] for key in result_keys if key in item}, item.pop('gate_signature'))
+        return item
+
+    return [
+        Stage("detect", detect, workers=detect_workers, queue_size=1, policy=policy),
+        Stage("infer", infer, workers=infer_workers, queue_size=1, policy=policy),
+    ]
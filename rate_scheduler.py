@@ -0,0 +1,93 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from face_tracking import iou
+
+
+class AdaptiveRateScheduler:
+    """
+    Decides how often frames are sampled for detection + inference.
+
+    Every result goes through `observe`. If the mood changed, the scores
+    moved by more than `score_delta` (L1 over Happy/Normal/Sad) or a face
+    appeared, disappeared or jumped (IoU under `iou_threshold`), the interval
+    snaps to 1 / max_hz. Otherwise it grows by `backoff` per stable result up
+    to 1 / min_hz. `due()` tells the source whether the next frame may be
+    taken; `effective_hz` is the rate actually achieved (EMA over samples).
+    """
+
+    def __init__(self, min_hz: float = 0.5, max_hz: float = 10.0, backoff: float = 1.5,
+                 score_delta: float = 0.1, iou_threshold: float = 0.5, smoothing: float = 0.2):
+        self.min_hz = min_hz
+        self.max_hz = max_hz
+        self.backoff = backoff
+        self.score_delta = score_delta
+        self.iou_threshold = iou_threshold
+        self.smoothing = smoothing
+        self.interval = 1.0 / max_hz
+        self.effective_hz = 0.0
+        self.changes = 0
+        self.stable = 0
+        self._last_sample = None
+        self._next_due = 0.0
+        self._previous: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def target_hz(self) -> float:
+        return 1.0 / self.interval
+
+    def due(self, now: Optional[float] = None) -> float:
+        """Seconds until the next sample may be taken (<= 0 means now)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return self._next_due - now
+
+    def sampled(self, now: Optional[float] = None):
+        """Record that a frame was taken for processing."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._last_sample is not None and now > self._last_sample:
+                hz = 1.0 / (now - self._last_sample)
+                self.effective_hz += self.smoothing * (hz - self.effective_hz) if self.effective_hz else hz
+            self._last_sample = now
+            self._next_due = now + self.interval
+
+    def _changed(self, result: Dict[str, Any]) -> bool:
+        previous = self._previous
+        if previous is None:
+            return True
+        face, last_face = result.get('face'), previous.get('face')
+        if (face is None) != (last_face is None):
+            return True
+        if face is not None and iou(face, last_face) < self.iou_threshold:
+            return True
+        if result.get('mood') != previous.get('mood'):
+            return True
+        emotions, last_emotions = result.get('emotions'), previous.get('emotions')
+        if emotions is None or last_emotions is None:
+            return False
+        return sum(abs(emotions[k] - last_emotions[k]) for k in ('Happy', 'Normal', 'Sad')) > self.score_delta
+
+    def observe(self, result: Dict[str, Any]):
+        """Speed up on change, back off exponentially while stable."""
+        with self._lock:
+            if self._changed(result):
+                self.changes += 1
+                self.interval = 1.0 / self.max_hz
+            else:
+                self.stable += 1
+                self.interval = min(self.interval * self.backoff, 1.0 / self.min_hz)
+            # A faster rate applies right away instead of after the old, longer wait
+            if self._last_sample is not None:
+                self._next_due = min(self._next_due, self._last_sample + self.interval)
+            self._previous = {k: result.get(k) for k in ('face', 'mood', 'emotions')}
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'target_hz': self.target_hz,
+            'effective_hz': self.effective_hz,
+            'changes': self.changes,
+            'stable': self.stable,
+        }
@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def dhash(face_roi: np.ndarray, hash_size: int = 8) -> int:
+    """Difference hash: sign of horizontal gradients on a (hash_size+1) x hash_size thumbnail."""
+    gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY) if face_roi.ndim == 3 else face_roi
+    thumb = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def ahash(face_roi: np.ndarray, hash_size: int = 8) -> int:
+    """Average hash: pixels of a hash_size x hash_size thumbnail above their mean."""
+    gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY) if face_roi.ndim == 3 else face_roi
+    thumb = cv2.resize(gray, (hash_size, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (thumb > thumb.mean()).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+HASHES = {'dhash': dhash, 'ahash': ahash}
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ResultCache:
+    """
+    Bounded LRU of emotion scores keyed by a perceptual hash of the face crop.
+
+    A lookup hits if a stored hash is within `max_distance` bits of the crop's
+    hash and younger than `ttl` seconds. Crops are hashed on their own pixels,
+    so the same face at a slightly different box or brightness still matches
+    while a changed expression flips enough gradient bits to miss.
+    """
+
+    def __init__(self, max_entries: int = 64, max_distance: int = 4, ttl: float = 2.0,
+                 hash_name: str = "dhash"):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.hash_fn = HASHES[hash_name]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self._entries: "OrderedDict[int, Tuple[float, Dict[str, float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, face_roi: np.ndarray) -> int:
+        return self.hash_fn(face_roi)
+
+    def get(self, key: int) -> Optional[Dict[str, float]]:
+        now = time.monotonic()
+        with self._lock:
+            match = key if key in self._entries else None
+            if match is None and self.max_distance:
+                match = min(
+                    (k for k in self._entries if hamming(k, key) <= self.max_distance),
+                    key=lambda k: hamming(k, key), default=None,
+                )
+            if match is not None:
+                stored, result = self._entries[match]
+                if now - stored <= self.ttl:
+                    self._entries.move_to_end(match)
+                    self.hits += 1
+                    return dict(result)
+                del self._entries[match]
+                self.expired += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: int, result: Dict[str, float]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expired': self.expired,
+        }
+
+
+class CachedDetector:
+    """
+    Wraps any detector class (process_face / process_faces) so crops that
+    hash close to a recent one reuse its scores instead of running the model.
+    Only the misses of a process_faces call go to the model, in one batch.
+    """
+
+    def __init__(self, detector, **cache_kwargs):
+        self.detector = detector
+        self.cache = ResultCache(**cache_kwargs)
+
+    def __getattr__(self, name):
+        if name == "detector":
+            raise AttributeError(name)
+        return getattr(self.detector, name)
+
+    def process_face(self, face_roi: np.ndarray) -> Dict[str, Any]:
+        return self.process_faces([face_roi])[0]
+
+    def process_faces(self, face_rois: List[np.ndarray]) -> List[Dict[str, Any]]:
+        keys = [self.cache.key(roi) for roi in face_rois]
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            for i, result in zip(missing, self.detector.process_faces([face_rois[i] for i in missing])):
+                self.cache.put(keys[i], result)
+                results[i] = result
+        return results
+
+    def stats(self) -> Dict[str, float]:
+        return self.cache.stats()
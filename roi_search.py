@@ -0,0 +1,126 @@
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class RoiFaceSearch:
+    """
+    Wraps a detector that has a `face_backend` (see face_backends.py) and
+    makes `detect_faces` cheaper:
+
+    1. search an expanded window around the last known face,
+    2. on a lower pyramid level (`scale`, e.g. 320x240 -> 160x120),
+    3. with min/max sizes adapted to the recently seen face size,
+    4. and only on a miss (or every `full_scan_every` calls, to notice new
+       faces elsewhere; 0 disables this) fall back to a full-frame scan.
+
+    Boxes are mapped back to full-resolution frame coordinates, so crops
+    taken for process_face are the same as with the plain detector.
+    """
+
+    def __init__(self, detector, scale: float = 0.5, window_margin: float = 0.75,
+                 size_slack: float = 0.4, min_size: Tuple[int, int] = (48, 48),
+                 history: int = 5, forget_after: int = 3, full_scan_every: int = 10,
+                 full_res_fallback: bool = False):
+        self.detector = detector
+        self.scale = scale
+        self.window_margin = window_margin
+        self.size_slack = size_slack
+        self.min_size = min_size
+        self.forget_after = forget_after
+        self.full_scan_every = full_scan_every
+        self.full_res_fallback = full_res_fallback
+        self.recent_sizes = deque(maxlen=history)
+        self.last_face: Optional[Dict[str, int]] = None
+        self.misses = 0
+        self.calls = 0
+        self.roi_hits = 0
+        self.frame_scans = 0
+        self.full_res_scans = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name == "detector":
+            raise AttributeError(name)
+        return getattr(self.detector, name)
+
+    def _size_bounds(self, adaptive: bool = True) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """(minSize, maxSize) in pyramid-level pixels; maxSize (0, 0) means unbounded."""
+        floor = max(1, int(self.min_size[0] * self.scale))
+        if not adaptive or not self.recent_sizes:
+            return (floor, floor), (0, 0)
+        size = float(np.median(self.recent_sizes)) * self.scale
+        low = max(floor, int(size * (1.0 - self.size_slack)))
+        high = max(low + 1, int(size * (1.0 + self.size_slack)))
+        return (low, low), (high, high)
+
+    def _scan(self, image: np.ndarray, min_size, max_size) -> List[Tuple[int, int, int, int]]:
+        faces = self.detector.face_backend.detect(image, min_size, max_size)
+        return [(f['x'], f['y'], f['w'], f['h']) for f in faces]
+
+    def detect_faces(self, frame: np.ndarray) -> List[Dict[str, int]]:
+        backend = self.detector.face_backend
+        # Cascades work on gray; convert before downscaling so only one channel is resized
+        image = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if backend.accepts_gray else frame
+        small = cv2.resize(image, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        with self._lock:
+            self.calls += 1
+            boxes = []
+            # full_scan_every <= 0: never force a full scan, only fall back on a miss
+            forced = self.full_scan_every > 0 and self.calls % self.full_scan_every == 0
+            if self.last_face is not None and not forced:
+                boxes = self._scan_window(small, *self._size_bounds())
+                if boxes:
+                    self.roi_hits += 1
+            if not boxes:
+                # Miss: whole frame, default size range so faces at a new distance are found
+                self.frame_scans += 1
+                boxes = self._scan(small, *self._size_bounds(adaptive=False))
+            faces = [self._to_frame_coords(box, frame.shape) for box in boxes]
+            if not faces and self.full_res_fallback:
+                self.full_res_scans += 1
+                faces = self.detector.detect_faces(frame)
+            self._remember(faces)
+            return faces
+
+    def _scan_window(self, small: np.ndarray, min_size, max_size) -> List[Tuple[int, int, int, int]]:
+        f = self.last_face
+        height, width = small.shape[:2]
+        mx, my = f['w'] * self.window_margin, f['h'] * self.window_margin
+        x0 = max(0, int((f['x'] - mx) * self.scale))
+        y0 = max(0, int((f['y'] - my) * self.scale))
+        x1 = min(width, int((f['x'] + f['w'] + mx) * self.scale))
+        y1 = min(height, int((f['y'] + f['h'] + my) * self.scale))
+        if x1 - x0 < min_size[0] or y1 - y0 < min_size[1]:
+            return []
+        return [(x + x0, y + y0, w, h) for (x, y, w, h) in self._scan(small[y0:y1, x0:x1], min_size, max_size)]
+
+    def _to_frame_coords(self, box, shape) -> Dict[str, int]:
+        x, y, w, h = box
+        inv = 1.0 / self.scale
+        fx, fy = int(round(x * inv)), int(round(y * inv))
+        fw = min(int(round(w * inv)), shape[1] - fx)
+        fh = min(int(round(h * inv)), shape[0] - fy)
+        return {'x': fx, 'y': fy, 'w': fw, 'h': fh}
+
+    def _remember(self, faces: List[Dict[str, int]]):
+        if faces:
+            biggest = max(faces, key=lambda f: f['w'] * f['h'])
+            self.last_face = biggest
+            self.recent_sizes.append(biggest['w'])
+            self.misses = 0
+            return
+        self.misses += 1
+        if self.misses >= self.forget_after:
+            self.last_face = None
+            self.recent_sizes.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'roi_hits': self.roi_hits,
+            'frame_scans': self.frame_scans,
+            'full_res_scans': self.full_res_scans,
+        }
@@ -0,0 +1,91 @@
+"""
+CPU-oriented runner for the SigLIP2 emotion classifier used by test2.py and
+graphic.py (their `fast=True` mode).
+
+Compared with calling the HF processor + model per batch it:
+
+- pins torch's intra-op threads (and one inter-op thread) once at start-up,
+- preprocesses in NumPy/torch instead of PIL: crops are resized with OpenCV
+  into a preallocated uint8 batch, then rescaled and normalized in place
+  with the processor's own size / mean / std,
+- runs under `torch.inference_mode()`,
+- optionally swaps the model for a TorchScript trace ("torchscript") or a
+  dynamic-quantized int8 trace ("int8"), saved under `cache_dir` so later
+  start-ups load the trace instead of rebuilding the model.
+"""
+import os
+from typing import List, Optional
+
+import cv2
+import numpy as np
+import torch
+from transformers import AutoImageProcessor, AutoModelForImageClassification
+
+MODEL_ID = "prithivMLmods/Facial-Emotion-Detection-SigLIP2"
+COMPILE_MODES = ("eager", "torchscript", "int8")
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "espejito")
+
+
+class FastSiglipClassifier:
+    MAX_BATCH = 8
+
+    def __init__(self, model_id: str = MODEL_ID, num_threads: Optional[int] = None,
+                 compile_mode: str = "eager", cache_dir: str = CACHE_DIR):
+        if compile_mode not in COMPILE_MODES:
+            raise ValueError(f"Unknown compile mode: {compile_mode} (choose from {', '.join(COMPILE_MODES)})")
+        torch.set_num_threads(num_threads or os.cpu_count() or 1)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Only allowed before torch has started any parallel work
+            pass
+
+        processor = AutoImageProcessor.from_pretrained(model_id)
+        self.size = (processor.size['height'], processor.size['width'])
+        self.rescale = float(processor.rescale_factor)
+        self.mean = torch.tensor(processor.image_mean, dtype=torch.float32).view(1, 3, 1, 1) / self.rescale
+        self.std = torch.tensor(processor.image_std, dtype=torch.float32).view(1, 3, 1, 1) / self.rescale
+        self._batch = np.zeros((self.MAX_BATCH,) + self.size + (3,), dtype=np.uint8)
+
+        self.compile_mode = compile_mode
+        self.model = self._load_model(model_id, compile_mode, cache_dir)
+        print(f"[DEBUG] SigLIP fast mode: {compile_mode}, {torch.get_num_threads()} threads")
+
+    def _load_model(self, model_id: str, compile_mode: str, cache_dir: str):
+        if compile_mode == "eager":
+            return AutoModelForImageClassification.from_pretrained(model_id).eval()
+        path = os.path.join(cache_dir, f"{model_id.replace('/', '__')}_{compile_mode}.pt")
+        if os.path.exists(path):
+            print(f"[DEBUG] Loading cached SigLIP trace from {path}")
+            return torch.jit.load(path).eval()
+        model = AutoModelForImageClassification.from_pretrained(model_id, torchscript=True).eval()
+        if compile_mode == "int8":
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        example = torch.zeros((1, 3) + self.size)
+        with torch.inference_mode():
+            traced = torch.jit.freeze(torch.jit.trace(model, example, strict=False))
+        os.makedirs(cache_dir, exist_ok=True)
+        torch.jit.save(traced, path)
+        print(f"[DEBUG] Saved SigLIP trace to {path}")
+        return traced
+
+    def _preprocess(self, face_rois: List[np.ndarray]) -> torch.Tensor:
+        height, width = self.size
+        for i, face_roi in enumerate(face_rois):
+            slot = self._batch[i]
+            shrink = face_roi.shape[0] > height or face_roi.shape[1] > width
+            cv2.resize(face_roi, (width, height), dst=slot,
+                       interpolation=cv2.INTER_AREA if shrink else cv2.INTER_LINEAR)
+            cv2.cvtColor(slot, cv2.COLOR_BGR2RGB, dst=slot)
+        pixels = torch.from_numpy(self._batch[:len(face_rois)]).permute(0, 3, 1, 2).float()
+        return pixels.sub_(self.mean).div_(self.std)
+
+    def predict(self, face_rois: List[np.ndarray]) -> torch.Tensor:
+        """Softmax probabilities, one row per BGR crop, MAX_BATCH crops per forward pass."""
+        probs = []
+        with torch.inference_mode():
+            for start in range(0, len(face_rois), self.MAX_BATCH):
+                outputs = self.model(self._preprocess(face_rois[start:start + self.MAX_BATCH]))
+                logits = outputs[0] if isinstance(outputs, tuple) else outputs.logits
+                probs.append(torch.nn.functional.softmax(logits, dim=-1))
+        return torch.cat(probs) if probs else torch.zeros((0, 0))
@@ -1,19 +1,32 @@
 from transformers import AutoImageProcessor, AutoModelForImageClassification
 import torch
 import cv2
+import numpy as np
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from face_backends import create_face_backend
+from siglip_fast import FastSiglipClassifier
 
 class CameraFacialEmotionDetector:
-    def __init__(self):
-        # Load the processor and model with `use_fast=False`
-        self.processor = AutoImageProcessor.from_pretrained(
-            "prithivMLmods/Facial-Emotion-Detection-SigLIP2", use_fast=False
-        )
-        self.model = AutoModelForImageClassification.from_pretrained(
-            "prithivMLmods/Facial-Emotion-Detection-SigLIP2"
-        )
-        self.model.eval()  # Set model to evaluation mode
+    MAX_BATCH = 8  # faces per forward pass in process_faces
+
+    def __init__(self, face_backend: Optional[str] = "haar", fast: bool = False,
+                 num_threads: Optional[int] = None, compile_mode: str = "eager"):
+        # CPU-optimized path (see siglip_fast.py); compile_mode "torchscript"/"int8" caches a trace on disk
+        self.fast = FastSiglipClassifier(num_threads=num_threads, compile_mode=compile_mode) if fast else None
+        if self.fast is None:
+            # Load the processor and model with `use_fast=False`
+            self.processor = AutoImageProcessor.from_pretrained(
+                "prithivMLmods/Facial-Emotion-Detection-SigLIP2", use_fast=False
+            )
+            self.model = AutoModelForImageClassification.from_pretrained(
+                "prithivMLmods/Facial-Emotion-Detection-SigLIP2"
+            )
+            self.model.eval()  # Set model to evaluation mode
+        
+            # Preallocated RGB batch (NHWC) that face crops are resized into
+            self._batch = np.zeros((self.MAX_BATCH, 224, 224, 3), dtype=np.uint8)
         
         # Define emotion mapping for the model
         self.emotion_mapping = {
@@ -25,21 +38,19 @@ class CameraFacialEmotionDetector:
             5: 'Surprise'
         }
         
-        # Load the Haar cascade for face detection
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        # Load the face detector backend (Haar cascade by default); None skips it (inference_backends.py)
+        self.face_backend = create_face_backend(face_backend) if face_backend is not None else None
 
     def detect_faces(self, frame: cv2.Mat) -> List[Dict[str, int]]:
         """
-        Detect faces in a video frame using Haar cascades.
+        Detect faces in a video frame using the configured backend.
         Args:
             frame (cv2.Mat): A single frame from the video
         
         Returns:
             List[Dict[str, int]]: List of bounding boxes for detected faces
         """
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=3, minSize=(48, 48))
-        return [{'x': x, 'y': y, 'w': w, 'h': h} for (x, y, w, h) in faces]
+        return self.face_backend.detect(frame)
 
     def process_face(self, face_roi: cv2.Mat) -> Dict:
         """
@@ -50,26 +61,47 @@ class CameraFacialEmotionDetector:
         Returns:
             Dict: Predicted top emotion and scores for all emotions
         """
-        # Resize face to match model's input size
-        face_resized = cv2.resize(face_roi, (224, 224))
-        face_rgb = cv2.cvtColor(face_resized, cv2.COLOR_BGR2RGB)
-        
-        # Convert to tensor
-        inputs = self.processor(images=[face_rgb], return_tensors="pt")
-        
-        # Perform inference
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
+        return self.process_faces([face_roi])[0]
+
+    def process_faces(self, face_rois: List[cv2.Mat]) -> List[Dict]:
+        """
+        Predict emotions for several cropped faces with one forward pass.
+        Args:
+            face_rois (List[cv2.Mat]): Cropped images of faces
         
+        Returns:
+            List[Dict]: One process_face-style result per crop, in order
+        """
+        if self.fast is not None:
+            return [self._to_result(face_probs) for face_probs in self.fast.predict(face_rois)]
+        results = []
+        for start in range(0, len(face_rois), self.MAX_BATCH):
+            chunk = face_rois[start:start + self.MAX_BATCH]
+            # Resize faces to match model's input size, straight into the batch buffer
+            for i, face_roi in enumerate(chunk):
+                face_rgb = cv2.cvtColor(face_roi, cv2.COLOR_BGR2RGB)
+                cv2.resize(face_rgb, (224, 224), dst=self._batch[i])
+
+            # Convert to tensor
+            inputs = self.processor(images=list(self._batch[:len(chunk)]), return_tensors="pt")
+
+            # Perform inference
+            with torch.no_grad():
+                outputs = self.model(**inputs)
+                probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
+
+            results.extend(self._to_result(face_probs) for face_probs in probs)
+        return results
+
+    def _to_result(self, face_probs: torch.Tensor) -> Dict:
         # Get the top prediction
-        predicted_class = probs.argmax().item()
-        confidence = probs[0][predicted_class].item()
+        predicted_class = face_probs.argmax().item()
+        confidence = face_probs[predicted_class].item()
         
         # Map predictions to emotions
         predictions = [
             {'emotion': self.emotion_mapping[i], 'confidence': prob.item()}
-            for i, prob in enumerate(probs[0])
+            for i, prob in enumerate(face_probs)
         ]
         predictions.sort(key=lambda x: x['confidence'], reverse=True)
         
@@ -97,12 +129,10 @@ class CameraFacialEmotionDetector:
                 # Detect faces in the frame
                 faces = self.detect_faces(frame)
                 
-                for face in faces:
+                # Process all faces to detect emotion in one batch
+                rois = [frame[f['y']:f['y']+f['h'], f['x']:f['x']+f['w']] for f in faces]
+                for face, emotions in zip(faces, self.process_faces(rois)):
                     x, y, w, h = face['x'], face['y'], face['w'], face['h']
-                    face_roi = frame[y:y+h, x:x+w]
-                    
-                    # Process face to detect emotion
-                    emotions = self.process_face(face_roi)
                     
                     # Output the detected emotions
                     timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
@@ -1,12 +1,192 @@
+"""
+Convert emotion_model.hdf5 to TFLite variants and report how they compare.
+
+    float32   plain conversion (model.tflite, what no_graphic.py loads by default)
+    float16   float16 weights, float32 compute
+    dynamic   int8 weights, activations quantized on the fly
+    int8      full integer model (int8 input/output), calibrated on face crops
+
+The representative dataset for int8 and the evaluation set for the report
+come from a local folder of face crops (any images; they are converted to
+64x64 grayscale like no_graphic.py does). Every other crop is used for
+calibration, the rest for evaluation. For each variant the report gives
+top-class agreement with the Keras model, mean per-invoke latency and size.
+Without crops the other variants are still written (plain
+`python tflite_conv.py` just produces model.tflite and friends), but int8
+and the report are skipped.
+
+With --fused the /255 normalization and the FER2013 -> Happy / Normal /
+Sad remapping (mood.py) are baked into the graph: the model takes the
+64x64 grayscale crop as uint8 and returns the three renormalized mood
+scores, which no_graphic.py detects and feeds without any float work.
+Fused files get a "_fused" suffix; int8 is not offered fused, since its
+uint8 input scale would come from calibration instead of being exactly 1/255.
+
+    python tflite_conv.py --crops fixtures/face_crops --variants float32 int8
+    python tflite_conv.py --fused --variants float32 float16
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from typing import Dict
+
+import cv2
+import numpy as np
 import tensorflow as tf
 
-# Load your Keras model
-model = tf.keras.models.load_model("emotion_model.hdf5")
+from mood import FER_HAPPY, FER_NORMAL, FER_SAD
+
+VARIANTS = ("float32", "float16", "dynamic", "int8")
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.bmp")
+FACE_SIZE = (64, 64)
+
+
+def load_crops(folder: str, limit: int) -> np.ndarray:
+    """Face crops as a float32 (N, 64, 64, 1) array in [0, 1]; N is 0 if the folder is missing or empty."""
+    crops = []
+    for pattern in IMAGE_PATTERNS:
+        for path in sorted(glob.glob(os.path.join(folder, "**", pattern), recursive=True)):
+            image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if image is None:
+                print(f"[DEBUG] Skipping unreadable image {path}")
+                continue
+            crops.append(cv2.resize(image, FACE_SIZE).astype("float32") / 255.0)
+            if len(crops) >= limit:
+                return np.stack(crops)[..., None]
+    if not crops:
+        return np.zeros((0,) + FACE_SIZE + (1,), dtype="float32")
+    return np.stack(crops)[..., None]
+
+
+def build_fused_model(model):
+    """uint8 (N, 64, 64, 1) crop -> renormalized [Happy, Normal, Sad] scores."""
+    pixels = tf.keras.Input(shape=FACE_SIZE + (1,), dtype=tf.uint8, name="face_uint8")
+    x = tf.keras.layers.Lambda(lambda t: tf.cast(t, tf.float32) / 255.0)(pixels)
+    preds = model(x)
+
+    def to_moods(p):
+        groups = [tf.reduce_sum(tf.gather(p, list(idx), axis=1), axis=1, keepdims=True)
+                  for idx in (FER_HAPPY, FER_NORMAL, FER_SAD)]
+        scores = tf.concat(groups, axis=1)
+        return scores / tf.maximum(tf.reduce_sum(scores, axis=1, keepdims=True), 1e-7)
+
+    return tf.keras.Model(pixels, tf.keras.layers.Lambda(to_moods, name="mood_scores")(preds))
+
+
+def fer_to_moods(preds: np.ndarray) -> np.ndarray:
+    """NumPy version of the fused remapping, for the agreement reference."""
+    scores = np.stack([preds[:, list(idx)].sum(axis=1) for idx in (FER_HAPPY, FER_NORMAL, FER_SAD)], axis=1)
+    return scores / np.maximum(scores.sum(axis=1, keepdims=True), 1e-7)
+
+
+def convert(model, variant: str, calibration: np.ndarray) -> bytes:
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if variant == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "dynamic":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif variant == "int8":
+        def representative_dataset():
+            for crop in calibration:
+                yield [crop[None]]
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def run_tflite(model_path: str, crops: np.ndarray) -> Dict[str, object]:
+    """Invoke the model once per crop, (de)quantizing if its input/output are integer."""
+    interpreter = tf.lite.Interpreter(model_path=model_path)
+    interpreter.allocate_tensors()
+    inp = interpreter.get_input_details()[0]
+    out = interpreter.get_output_details()[0]
+    in_scale, in_zero = inp['quantization']
+    out_scale, out_zero = out['quantization']
+    preds, latencies = [], []
+    for crop in crops:
+        x = crop[None]
+        if in_scale:
+            info = np.iinfo(inp['dtype'])
+            x = np.clip(np.round(x / in_scale + in_zero), info.min, info.max)
+        elif inp['dtype'] == np.uint8:
+            # Fused model: raw pixels
+            x = np.round(x * 255.0)
+        x = x.astype(inp['dtype'])
+        start = time.perf_counter()
+        interpreter.set_tensor(inp['index'], x)
+        interpreter.invoke()
+        y = interpreter.get_tensor(out['index'])[0]
+        latencies.append(time.perf_counter() - start)
+        preds.append((y.astype("float32") - out_zero) * out_scale if out_scale else y)
+    return {'preds': np.array(preds), 'latency_ms': 1000.0 * float(np.mean(latencies))}
+
+
+def output_path(out_dir: str, variant: str, fused: bool = False) -> str:
+    name = "model" if variant == "float32" else f"model_{variant}"
+    return os.path.join(out_dir, name + ("_fused" if fused else "") + ".tflite")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the Keras emotion model to TFLite variants")
+    parser.add_argument("--model", default="emotion_model.hdf5")
+    parser.add_argument("--crops", default="fixtures/face_crops", help="folder of face crop images")
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, help="default: all (int8 only with crops)")
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--limit", type=int, default=400, help="max crops to load")
+    parser.add_argument("--fused", action="store_true", help="bake normalization and mood remapping into the model")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(args.model, compile=False)
+    variants = args.variants or list(VARIANTS)
+    crops = load_crops(args.crops, args.limit)
+    if not len(crops):
+        if args.variants and "int8" in args.variants:
+            raise SystemExit(f"int8 needs face crops for calibration; none found in {args.crops}")
+        print(f"No face crops in {args.crops}: skipping int8 and the accuracy report")
+        variants = [v for v in variants if v != "int8"]
+    calibration = crops[::2]
+    evaluation = crops[1::2] if len(crops) > 1 else crops
+    reference = None
+    if len(crops):
+        print(f"{len(calibration)} calibration crops, {len(evaluation)} evaluation crops")
+        reference = model.predict(evaluation, verbose=0)
+        if args.fused:
+            reference = fer_to_moods(reference)
+        reference = reference.argmax(axis=1)
+    if args.fused:
+        model = build_fused_model(model)
+
+    report: Dict[str, Dict[str, float]] = {}
+    if reference is not None:
+        print(f"{'variant':<8} {'agree %':>8} {'ms/invoke':>10} {'size KB':>8}  file")
+    for variant in variants:
+        if args.fused and variant == "int8":
+            print(f"{variant:<8} skipped: not available fused")
+            continue
+        path = output_path(args.out_dir, variant, args.fused)
+        with open(path, "wb") as f:
+            f.write(convert(model, variant, calibration))
+        if reference is None:
+            print(f"{variant:<8} written to {path}")
+            continue
+        result = run_tflite(path, evaluation)
+        agreement = float((result['preds'].argmax(axis=1) == reference).mean())
+        size_kb = os.path.getsize(path) / 1024.0
+        report[variant] = {'path': path, 'agreement': agreement,
+                           'latency_ms': result['latency_ms'], 'size_kb': size_kb}
+        print(f"{variant:<8} {100 * agreement:8.1f} {result['latency_ms']:10.3f} {size_kb:8.1f}  {path}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
 
-# Convert to TFLite
-converter = tf.lite.TFLiteConverter.from_keras_model(model)
-tflite_model = converter.convert()
 
-# Save the model
-with open("model.tflite", "wb") as f:
-    f.write(tflite_model)
+if __name__ == "__main__":
+    main()